@@ -0,0 +1,153 @@
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import httpx
+from run_report import span
+
+# =========================================================
+# [공통] asyncio 기반 Sender 엔진
+# 수집(fetch) → 판단(classify) → 요약(summarize) → 전송(publish) 단계를 큐로 연결하고,
+# 단계마다 정해진 수의 워커가 이벤트 루프 위에서 동시에 처리합니다.
+# 전체 소요 시간은 단계별 시간의 합이 아니라 가장 느린 단계에 맞춰집니다.
+# - async def 단계(슬랙 전송 등)는 루프에서 바로 실행하고, 공유 HTTP/2 클라이언트로
+#   호스트별 keep-alive 연결을 재사용합니다.
+# - 일반 함수 단계(본문 수집·LLM 호출처럼 SQLite 캐시나 동기 SDK를 쓰는 단계)는
+#   워커 수만큼의 스레드 풀에서 실행되어, 루프를 막지 않고 다른 단계와 겹쳐서 돕니다.
+# - async 단계 안의 블로킹 작업(시트 쓰기 버퍼 flush·레이트 리미터 대기, SQLite 기록)은
+#   run_blocking으로 전용 스레드 하나에서 실행해, 그동안에도 다른 단계의 결과를 계속 받습니다.
+# - 공유 클라이언트로 같은 호스트에 동시에 나가는 요청 수는 호스트별 세마포어로 제한합니다.
+#   지금 이 클라이언트를 쓰는 건 슬랙 웹훅뿐이고, 본문 수집(requests)과 OpenAI SDK 호출은
+#   스레드 풀 단계에서 각자의 연결 풀·rate_limiter로 동시성을 조절합니다.
+# 기존 실행 명령(python xxx_sender.py)은 동기 래퍼 run_pipeline으로 그대로 동작합니다.
+# =========================================================
+HOST_CONCURRENCY = {
+    "hooks.slack.com": 1,       # Incoming Webhook은 순서대로 하나씩
+}
+DEFAULT_HOST_CONCURRENCY = 4
+POOL_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60)
+TIMEOUT = httpx.Timeout(15.0, connect=10.0)
+
+_DONE = object()
+_engine = None
+
+
+class AsyncEngine:
+    def __init__(self, host_concurrency=None):
+        self.host_concurrency = dict(HOST_CONCURRENCY, **(host_concurrency or {}))
+        self.client = httpx.AsyncClient(http2=True, limits=POOL_LIMITS, timeout=TIMEOUT)
+        self._semaphores = {}
+        # 시트 쓰기 순서가 바뀌지 않도록 블로킹 작업은 스레드 하나에서 차례로 실행합니다.
+        self.blocking_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="blocking")
+
+    def host_slot(self, url):
+        host = urlparse(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.host_concurrency.get(host, DEFAULT_HOST_CONCURRENCY))
+        return self._semaphores[host]
+
+    async def request(self, method, url, **kwargs):
+        async with self.host_slot(url):
+            return await self.client.request(method, url, **kwargs)
+
+    async def post_json(self, url, payload, limiter=None):
+        # limiter(rate_limiter.RateLimiter)를 주면 요청 한도와 429 재시도를 동기 호출과 공유합니다.
+        if limiter is None:
+            return await self.request("POST", url, json=payload)
+        return await limiter.acall(self.request, "POST", url, json=payload)
+
+    async def aclose(self):
+        await self.client.aclose()
+        self.blocking_executor.shutdown(wait=True)
+
+
+async def post_json(url, payload, limiter=None):
+    # 실행 중인 파이프라인의 공유 클라이언트로 JSON을 POST합니다 (async 단계에서 사용).
+    if _engine is None:
+        raise RuntimeError("async_engine.run_pipeline 안에서만 사용할 수 있습니다.")
+    return await _engine.post_json(url, payload, limiter)
+
+
+async def run_blocking(func, *args):
+    # async 단계에서 블로킹 함수(시트 쓰기 등)를 이벤트 루프 밖에서 실행하고 결과를 기다립니다.
+    if _engine is None:
+        raise RuntimeError("async_engine.run_pipeline 안에서만 사용할 수 있습니다.")
+    return await asyncio.get_running_loop().run_in_executor(_engine.blocking_executor, func, *args)
+
+
+def openai_http_client(max_connections=16):
+    # OpenAI SDK(동기)에 넘길 HTTP/2 keep-alive 연결 풀 (LLM 워커들이 연결을 재사용)
+    return httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                            keepalive_expiry=60),
+        timeout=httpx.Timeout(60.0, connect=10.0),
+    )
+
+
+async def run_pipeline_async(items, stages, on_error=None, max_queue=8, host_concurrency=None, on_finish=None):
+    """
+    items: 처리할 행(dict) 목록
+    stages: [(단계 이름, 처리 함수, 워커 수), ...]
+      - 처리 함수가 item을 반환하면 다음 단계로 넘기고, None을 반환하면 해당 행 처리를 끝냅니다.
+      - 처리 함수가 async def면 이벤트 루프에서, 아니면 스레드 풀에서 실행합니다.
+    on_error: 단계에서 예외가 나면 on_error(item, 단계 이름, 예외)를 호출하고 그 행은 건너뜁니다.
+    on_finish(코루틴 함수)는 모든 단계가 끝난 뒤, 공유 클라이언트를 닫기 전에 호출합니다 (남은 묶음 전송 등).
+    """
+    global _engine
+    loop = asyncio.get_running_loop()
+    thread_workers = sum(workers for _, func, workers in stages if not inspect.iscoroutinefunction(func))
+    executor = ThreadPoolExecutor(max_workers=max(1, thread_workers), thread_name_prefix="stage")
+    queues = [asyncio.Queue(maxsize=max_queue) for _ in stages]
+    _engine = AsyncEngine(host_concurrency)
+
+    async def worker(name, func, in_q, out_q):
+        while True:
+            item = await in_q.get()
+            if item is _DONE:
+                return
+            try:
+                with span(f"stage.{name}"):
+                    if inspect.iscoroutinefunction(func):
+                        result = await func(item)
+                    else:
+                        result = await loop.run_in_executor(executor, func, item)
+            except Exception as e:
+                if on_error:
+                    try:
+                        on_error(item, name, e)
+                    except Exception as handler_error:
+                        print(f"❌ 오류 처리 중 추가 오류 ({name}): {handler_error}")
+                continue
+            if result is not None and out_q is not None:
+                await out_q.put(result)
+
+    async def run_stage(i, name, func, workers):
+        out_q = queues[i + 1] if i + 1 < len(stages) else None
+        await asyncio.gather(*(worker(name, func, queues[i], out_q) for _ in range(workers)))
+        # 단계의 워커가 모두 끝나면 다음 단계의 워커 수만큼 종료 신호를 전달합니다.
+        if out_q is not None:
+            for _ in range(stages[i + 1][2]):
+                await out_q.put(_DONE)
+
+    async def feed():
+        for item in items:
+            await queues[0].put(item)
+        for _ in range(stages[0][2]):
+            await queues[0].put(_DONE)
+
+    try:
+        await asyncio.gather(feed(), *(
+            run_stage(i, name, func, workers) for i, (name, func, workers) in enumerate(stages)
+        ))
+        if on_finish:
+            await on_finish()
+    finally:
+        await _engine.aclose()
+        _engine = None
+        executor.shutdown(wait=True)
+
+
+def run_pipeline(items, stages, on_error=None, max_queue=8, on_finish=None):
+    # 동기 래퍼: 기존 sender 코드와 GitHub Actions 실행 명령을 바꾸지 않고 async 엔진을 씁니다.
+    asyncio.run(run_pipeline_async(items, stages, on_error, max_queue, on_finish=on_finish))
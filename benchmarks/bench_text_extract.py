@@ -0,0 +1,60 @@
+import os
+import sys
+import glob
+import time
+import argparse
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from text_extract import extract_blocks
+
+# =========================================================
+# [벤치마크] 상세 페이지 본문 추출: 기존 BeautifulSoup 방식 vs text_extract.extract_blocks
+# 사용법: python benchmarks/bench_text_extract.py [저장한 html 파일 ...]
+#   파일을 주지 않으면 benchmarks/pages/*.html, 그것도 없으면 깊게 중첩된 가상 채용 페이지를 씁니다.
+# =========================================================
+TAGS = ['p', 'h2', 'h3', 'li', 'span', 'div']   # 가장 무거운 offercent 설정
+
+
+def legacy_extract(html, tags=TAGS, min_len=10, budget=3500):
+    soup = BeautifulSoup(html, 'html.parser')
+    text_content = " ".join([p.get_text().strip() for p in soup.find_all(tags) if len(p.get_text().strip()) > min_len])
+    return text_content[:budget]
+
+
+def synthetic_page(depth=40, items_per_level=8):
+    # 채용 공고처럼 div가 깊게 중첩되고, 각 단계에 문단·목록이 섞인 페이지
+    body = ""
+    for d in range(depth):
+        items = "".join(f"<li><span>담당 업무 {d}-{i}: 브랜드 콘텐츠 기획과 운영을 맡습니다.</span></li>" for i in range(items_per_level))
+        body = f"<div class='l{d}'><h3>섹션 {d} 제목입니다</h3><p>섹션 {d}의 설명 문단으로, 회사와 팀을 소개하는 문장이 이어집니다.</p><ul>{items}</ul>{body}</div>"
+    return f"<html><head><script>var tracking = 'x';</script></head><body>{body}</body></html>"
+
+
+def bench(func, html, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func(html)
+    return (time.perf_counter() - started) / repeat, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="본문 추출 방식별 속도를 비교합니다.")
+    parser.add_argument("files", nargs="*", help="저장한 상세 페이지 html 파일")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join(os.path.dirname(__file__), "pages", "*.html")))
+    pages = [(os.path.basename(f), open(f, encoding="utf-8", errors="replace").read()) for f in files]
+    if not pages:
+        pages = [("synthetic(depth=40)", synthetic_page())]
+
+    # inflation: 자르기 전 기존 방식 텍스트 길이 / 새 방식 텍스트 길이 (중첩 태그 중복 정도)
+    print(f"{'page':<28}{'KB':>7}{'legacy ms':>12}{'blocks ms':>12}{'speedup':>9}{'inflation':>11}")
+    for name, html in pages:
+        legacy_time, _ = bench(legacy_extract, html, args.repeat)
+        new_time, _ = bench(lambda h: extract_blocks(h, TAGS, min_len=10, budget=3500), html, args.repeat)
+        legacy_full = len(legacy_extract(html, budget=None))
+        blocks_full = len(extract_blocks(html, TAGS, min_len=10, budget=10 ** 9)) or 1
+        print(f"{name[:27]:<28}{len(html) / 1024:>7.1f}{legacy_time * 1000:>12.1f}{new_time * 1000:>12.1f}"
+              f"{legacy_time / new_time:>8.1f}x{legacy_full / blocks_full:>10.1f}x")
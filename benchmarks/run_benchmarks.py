@@ -0,0 +1,454 @@
+import os
+import re
+import sys
+import glob
+import html
+import json
+import random
+import shutil
+import argparse
+import itertools
+import platform
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import urlparse
+
+# 로컬 캐시(URL 인덱스·상태 인덱스)는 임시 폴더에 만들고, 시트 쓰기 한도는 풀어 둡니다.
+BENCH_CACHE_DIR = tempfile.mkdtemp(prefix="flint-bench-")
+os.environ["FLINT_CACHE_DIR"] = BENCH_CACHE_DIR
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import rate_limiter
+rate_limiter.LIMITS["sheets"] = {"rate": 1e9, "burst": 1e9}
+
+import capture
+import seen_index
+import side_scraper
+import letspl_scraper
+import offercent_scraper
+import surfit_scraper
+import mix_scraper
+from scraper_utils import ResultCollector, append_new_rows
+from sheet_utils import read_columns
+from status_index import StatusIndex
+from text_extract import BlockExtractor
+from bench_text_extract import synthetic_page
+
+# =========================================================
+# [벤치마크] 수집·중복 제거·시트 병합 핵심 경로
+# 케이스마다 실행 시간(반복 측정의 최솟값)과 최대 메모리(tracemalloc)를 재고,
+# 저장된 기준값(benchmarks/baseline.json)보다 허용 범위 이상 느려지거나 메모리를 더 쓰면 실패(종료 코드 1)합니다.
+# 최솟값은 다른 프로세스·GC의 방해를 가장 덜 받은 측정이라 실행마다 가장 덜 흔들립니다.
+# 사용법:
+#   python benchmarks/run_benchmarks.py                  # 기준값과 비교
+#   python benchmarks/run_benchmarks.py -k extract       # 이름에 extract가 들어간 케이스만
+#   python benchmarks/run_benchmarks.py --save-baseline --runs 5  # 5번 돌려 기준값으로 저장
+# 입력은 가상 데이터이고, capture.py로 기록한 상세 페이지(fixtures/)가 있으면 extract.recorded.* 케이스가 추가됩니다
+# (기록 입력은 환경마다 달라 기준값 비교에서는 빠집니다).
+# =========================================================
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+SIZES = (1000, 10000, 100000)
+TIME_TOLERANCE = 0.5        # 기준값보다 50% 넘게 느리면 실패
+SHORT_CASE_MS = 10.0        # 기준값이 이보다 짧은 케이스는 타이머·캐시 영향이 커서
+SHORT_TIME_TOLERANCE = 1.0  # 두 배 넘게 느려질 때만 실패로 봅니다.
+MEMORY_TOLERANCE = 0.25
+MIN_TIME_DELTA_MS = 2.0     # 이보다 작은 차이는 측정 오차로 봅니다.
+MIN_MEMORY_DELTA_KB = 64
+TARGET_SECONDS = 0.5        # 케이스마다 대략 이만큼 반복해서 최솟값을 냅니다.
+MIN_REPEATS, MAX_REPEATS = 5, 100
+BASELINE_RUNS = 3           # --save-baseline 기본 실행 횟수
+
+# sender별 본문 추출 설정 (각 *_sender.py의 extract_text와 같게 유지)
+SENDER_EXTRACTORS = {
+    "side": BlockExtractor(['p', 'h2', 'h3', 'li', 'span'], min_len=10, budget=3500),
+    "letspl": BlockExtractor(['p', 'h2', 'h3', 'li', 'span'], min_len=10, budget=3500),
+    "offercent": BlockExtractor(['p', 'h2', 'h3', 'li', 'span', 'div'], min_len=10, budget=3500),
+    "surfit": BlockExtractor(['p', 'h2', 'h3'], min_len=20, budget=3500),
+    "mix": BlockExtractor(['p', 'h2', 'h3'], min_len=20, budget=3500),
+}
+
+
+# =========================================================
+# 가상 입력
+# =========================================================
+class FakeSheet:
+    """read_columns·append_new_rows가 쓰는 gspread Worksheet 메서드만 흉내 냅니다 (메모리 안의 2차원 목록)."""
+
+    def __init__(self, headers, rows):
+        self.values = [list(headers)] + [list(r) for r in rows]
+
+    def row_values(self, row):
+        return list(self.values[row - 1]) if row <= len(self.values) else []
+
+    @staticmethod
+    def _col(letters):
+        n = 0
+        for ch in letters:
+            n = n * 26 + ord(ch) - 64
+        return n - 1
+
+    def batch_get(self, ranges, major_dimension="COLUMNS"):
+        results = []
+        for a1 in ranges:
+            m = re.match(r"([A-Z]+)(\d+):([A-Z]+)(\d*)$", a1)
+            c1, r1, c2, r2 = self._col(m.group(1)), int(m.group(2)), self._col(m.group(3)), m.group(4)
+            rows = self.values[r1 - 1:int(r2) if r2 else len(self.values)]
+            columns = []
+            for c in range(c1, c2 + 1):
+                col = [row[c] if c < len(row) else "" for row in rows]
+                while col and col[-1] == "":
+                    col.pop()   # 끝쪽 빈 칸은 API처럼 잘라서 돌려줍니다.
+                columns.append(col)
+            results.append(columns if any(columns) else [])
+        return results
+
+    def append_rows(self, rows):
+        self.values.extend(rows)
+
+
+SCRAPER_HEADERS = ['title', 'url', 'scraped_at', 'status', 'location']
+SENDER_HEADERS = ['title', 'url', 'scraped_at', 'status', 'location', 'identity']
+TITLE_WORDS = ["콘텐츠", "에디터", "마케터", "브랜드", "기획", "운영", "모집", "사이드", "프로젝트", "팀원"]
+
+
+def _title(rng):
+    return " ".join(rng.choice(TITLE_WORDS) for _ in range(5))
+
+
+def _sheet_rows(n, rng, archived_tail=50):
+    # 스크래퍼가 붙인 행들: 앞쪽은 처리가 끝났고, 끝쪽 archived_tail행만 새 행입니다.
+    rows = []
+    for i in range(n):
+        status = "archived" if i >= n - archived_tail else rng.choice(["published", "dropped", "published"])
+        rows.append([_title(rng), f"https://sideproject.co.kr/projects/?bmode=view&idx={100000 + i}",
+                     "2026-01-01", status, rng.choice(side_scraper.REGIONS), ""])
+    return rows
+
+
+def _scraped_items(n, rng, existing):
+    # 이번 실행에서 모은 공고: 절반은 이미 시트에 있는 URL
+    items = []
+    for i in range(n):
+        idx = 100000 + (rng.randrange(existing) if i % 2 == 0 else existing + i)
+        items.append({'title': _title(rng), 'url': f"https://sideproject.co.kr/projects/?bmode=view&idx={idx}",
+                      'scraped_at': "2026-01-02", 'location': "서울"})
+    return items
+
+
+def _card_texts(n, rng):
+    # 목록 카드 텍스트 (제목 줄 + 지역·모집 정보 줄, 지역이 없는 카드도 섞음)
+    regions = side_scraper.REGIONS + [""] * 6
+    return [f"{_title(rng)}\n{rng.choice(TITLE_WORDS)} · {rng.choice(regions)} · D-{rng.randrange(30)}" for _ in range(n)]
+
+
+def _info_texts(n, rng):
+    # offercent 카드의 지역·경력 정보 ("서울 강남구 · 경력 3~5년" 등)
+    places = ["서울 강남구", "서울 마포구", "경기 성남시", "부산 해운대구", "원격 근무"]
+    exps = ["경력 3~5년", "신입", "경력무관", "경력 1년 이상", "신입·경력"]
+    return [f"{rng.choice(places)} · {rng.choice(exps)}" if i % 5 else rng.choice(places) for i in range(n)]
+
+
+def _links(site, n, rng):
+    # 사이트별 카드 링크 (약 40%는 같은 실행 안에서 다시 나오는 중복, side·offercent는 파라미터만 다른 중복 포함)
+    ids = [rng.randrange(int(n * 0.6)) for _ in range(n)]
+    if site == "side":
+        return [f"https://sideproject.co.kr/projects/?bmode=view&idx={i}&page={rng.randrange(3)}" for i in ids]
+    if site == "offercent":
+        return [f"https://offercent.co.kr/jd/{i}?utm_source=list&pos={rng.randrange(9)}" for i in ids]
+    return [f"https://{site}.example/p/{i}" for i in ids]
+
+
+_run_ids = itertools.count()
+
+
+# =========================================================
+# 케이스: (이름, 준비 함수, 측정 함수) — 준비 함수는 반복마다 측정 밖에서 호출됩니다.
+# =========================================================
+def append_rows_cases(sizes):
+    cases = []
+    for n in sizes:
+        rng = random.Random(n)
+        base_rows = [r[:5] for r in _sheet_rows(n, rng)]
+        items = _scraped_items(200, rng, n)
+
+        def bootstrap_setup(n=n, base_rows=base_rows, items=items):
+            # 첫 실행: 비어 있는 URL 인덱스를 시트의 url 열로 채운 뒤 새 행만 만듭니다.
+            path = os.path.join(BENCH_CACHE_DIR, f"bootstrap-{n}-{next(_run_ids)}.sqlite3")
+            seen_index._indexes["bench"] = seen_index.SeenIndex("bench", path=path)
+            return FakeSheet(SCRAPER_HEADERS, base_rows), [dict(i) for i in items]
+
+        def warm_setup(n=n, base_rows=base_rows, items=items):
+            # 이후 실행: 인덱스가 시트의 마지막 행까지 맞춰져 있으므로, 헤더와 동기화 지점 뒤의 url 셀만 읽고 새 행을 만듭니다.
+            _warm_index("bench", f"warm-{n}", [r[1] for r in base_rows], len(base_rows) + 1)
+            return FakeSheet(SCRAPER_HEADERS, base_rows), [dict(i) for i in items]
+
+        def run(sheet, data):
+            return append_new_rows(sheet, data, "bench", SCRAPER_HEADERS)
+
+        cases.append((f"append_rows.bootstrap.{n}", bootstrap_setup, run))
+        cases.append((f"append_rows.warm.{n}", warm_setup, run))
+    return cases
+
+
+def status_filter_cases(sizes):
+    cases = []
+    names = ['status', 'title', 'url', 'location']
+    for n in sizes:
+        sheet = FakeSheet(SENDER_HEADERS, _sheet_rows(n, random.Random(n)))
+
+        def full(sheet=sheet):
+            # sender의 'archived' 행 고르기: 필요한 열만 전체 읽기 + 상태 필터
+            _, rows = read_columns(sheet, names, optional=['location'])
+            return [r for r in rows if r[1].strip().lower() == 'archived']
+
+        def watermark_setup(n=n):
+            index = StatusIndex("bench", path=os.path.join(BENCH_CACHE_DIR, "status_index.json"))
+            index.watermark, index.exceptions, index.full_scan_at = n - 49, [5, 17], time.time()
+            return (index,)
+
+        def watermark(index, sheet=sheet):
+            # 상태 인덱스 사용 시: watermark 뒤쪽 새 행과 예외 행만 읽기
+            _, rows = index.read(sheet, names, optional=['location'])
+            return [r for r in rows if r[1].strip().lower() == 'archived']
+
+        cases.append((f"status_filter.full.{n}", None, full))
+        cases.append((f"status_filter.watermark.{n}", watermark_setup, watermark))
+    return cases
+
+
+def _warm_index(gid, name, urls, synced_rows):
+    # 미리 채워 둔 URL 인덱스 파일을 복사해 씁니다 (측정 실행이 새 URL을 추가하므로 반복마다 새로 복사).
+    template = os.path.join(BENCH_CACHE_DIR, f"{name}.sqlite3")
+    if not os.path.exists(template):
+        index = seen_index.SeenIndex(gid, path=template)
+        index.add_many(urls)
+        index.set_synced_rows(synced_rows)
+    path = os.path.join(BENCH_CACHE_DIR, f"{name}-{next(_run_ids)}.sqlite3")
+    shutil.copyfile(template, path)
+    seen_index._indexes[gid] = seen_index.SeenIndex(gid, path=path)
+
+
+def _listing_html(site, links, rng):
+    # scrape_static이 찾는 카드 마크업으로 목록 페이지를 만듭니다.
+    if site == "side":
+        cards = [f'<a href="{html.escape(h)}">{_title(rng)}<br>{rng.choice(side_scraper.REGIONS)}</a>' for h in links]
+    elif site == "surfit":
+        cards = [f'<article class="ct-item"><a class="title" href="{h}">{_title(rng)}</a></article>' for h in links]
+    else:
+        cards = [f'<a href="{h}"><article><span class="line-clamp-2">{_title(rng)}</span></article></a>' for h in links]
+    return "<html><body>" + "\n".join(cards) + "</body></html>"
+
+
+DEDUP_SCRAPERS = {
+    "side": side_scraper, "letspl": letspl_scraper, "offercent": offercent_scraper,
+    "surfit": surfit_scraper, "mix": mix_scraper,
+}
+OFFERCENT_HEADERS = ['company', 'title', 'location', 'experience', 'url', 'scraped_at', 'status']
+
+
+def dedup_cases(n=2000):
+    cases = []
+    for site, module in DEDUP_SCRAPERS.items():
+        rng = random.Random(site)
+        links = _links(site, n, rng)
+        canonical = getattr(module, "canonical_url", lambda url: url)
+        # 시트에는 이번 목록의 절반쯤이 지난 실행에서 이미 저장돼 있습니다.
+        saved = sorted({canonical(h) for h in links[:n // 2]})
+        headers = OFFERCENT_HEADERS if site == "offercent" else SCRAPER_HEADERS
+        url_col = headers.index('url')
+        sheet_rows = [[u if i == url_col else "" for i in range(len(headers))] for u in saved]
+        gid = module.CONFIG["gid"]
+
+        def setup(site=site, gid=gid, saved=saved, headers=headers, sheet_rows=sheet_rows):
+            _warm_index(gid, f"dedup-{site}", saved, len(sheet_rows) + 1)
+            return (FakeSheet(headers, sheet_rows),)
+
+        if hasattr(module, "scrape_static"):
+            # 정적 수집 경로 그대로: 목록 파싱 → ResultCollector 중복 제거 → update_sheet(append_new_rows)
+            page = _listing_html(site, links, rng)
+            module.fetch_html = lambda url, timeout=10, page=page: page
+
+            def run(sheet, module=module):
+                module.update_sheet(sheet, module.scrape_static())
+        else:
+            # 브라우저로만 수집하는 사이트: 카드 순회와 같은 ResultCollector 호출 뒤 update_sheet
+            def run(sheet, module=module, links=links):
+                collector = ResultCollector(getattr(module, "canonical_url", None))
+                for href in links:
+                    if href in collector: continue
+                    collector.add({'title': "제목", 'url': href, 'scraped_at': "2026-01-02", 'location': "서울"})
+                module.update_sheet(sheet, collector.items())
+
+        cases.append((f"dedup.{site}.{n}", setup, run))
+    return cases
+
+
+def classify_cases(n=10000):
+    rng = random.Random(7)
+    texts, infos = _card_texts(n, rng), _info_texts(n, rng)
+
+    def side():
+        return [side_scraper.parse_link("https://sideproject.co.kr/projects/?bmode=view&idx=1", t, "2026-01-01")
+                for t in texts]
+
+    def letspl():
+        return [next((k for k in letspl_scraper.REGIONS if k in t), "미정") for t in texts]
+
+    def offercent():
+        return [offercent_scraper.classify_info(info) for info in infos]
+
+    return [(f"classify.side.{n}", None, side), (f"classify.letspl.{n}", None, letspl),
+            (f"classify.offercent.{n}", None, offercent)]
+
+
+def extract_cases():
+    cases = []
+    page = synthetic_page()
+    for site, extractor in SENDER_EXTRACTORS.items():
+        cases.append((f"extract.synthetic.{site}", None, lambda extractor=extractor: extractor(page)))
+
+    # capture.py로 기록한 상세 페이지 (호스트별로 묶어 한 케이스로)
+    by_host = {}
+    for entry in capture.load_index().values():
+        if entry["kind"] == "page" and entry.get("extract"):
+            html = capture.read_body(entry).decode("utf-8", errors="replace")
+            by_host.setdefault(urlparse(entry["url"]).netloc, []).append((BlockExtractor(**entry["extract"]), html))
+    for path in sorted(glob.glob(os.path.join(BENCH_DIR, "pages", "*.html"))):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            by_host.setdefault("pages", []).append((SENDER_EXTRACTORS["offercent"], f.read()))
+    for host, pages in sorted(by_host.items()):
+        cases.append((f"extract.recorded.{host}", None, lambda pages=pages: [ex(html) for ex, html in pages]))
+    return cases
+
+
+# =========================================================
+# 측정 · 기준값 비교
+# =========================================================
+def measure(setup, func):
+    args = setup() if setup else ()
+    started = time.perf_counter()
+    func(*args)
+    first = time.perf_counter() - started
+    repeats = max(MIN_REPEATS, min(MAX_REPEATS, int(TARGET_SECONDS / max(first, 1e-6))))
+
+    times = []
+    for _ in range(repeats):
+        args = setup() if setup else ()
+        started = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - started)
+
+    # 메모리는 추적 오버헤드가 시간에 섞이지 않도록 따로 한 번 더 실행해 잽니다.
+    args = setup() if setup else ()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"ms": round(min(times) * 1000, 3), "peak_kb": round(peak / 1024, 1), "repeats": repeats}
+
+
+def compare(results, baseline, time_tolerance, memory_tolerance):
+    failures = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        tolerance = max(time_tolerance, SHORT_TIME_TOLERANCE) if base["ms"] < SHORT_CASE_MS else time_tolerance
+        if r["ms"] > base["ms"] * (1 + tolerance) and r["ms"] - base["ms"] > MIN_TIME_DELTA_MS:
+            failures.append(f"{name}: 시간 {base['ms']:.2f}ms → {r['ms']:.2f}ms")
+        if r["peak_kb"] > base["peak_kb"] * (1 + memory_tolerance) and r["peak_kb"] - base["peak_kb"] > MIN_MEMORY_DELTA_KB:
+            failures.append(f"{name}: 메모리 {base['peak_kb']:.0f}KB → {r['peak_kb']:.0f}KB")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="수집·중복 제거·시트 병합 경로의 시간과 메모리를 재고 기준값과 비교합니다.")
+    parser.add_argument("-k", dest="keyword", help="이름에 이 문자열이 들어간 케이스만 실행")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="시트 행 수 (쉼표로 구분)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="현재 결과를 기준값으로 저장")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE, help="허용하는 시간 증가 비율")
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    parser.add_argument("--runs", type=int, help=f"전체 측정 반복 횟수 (기본 1, --save-baseline은 {BASELINE_RUNS})")
+    parser.add_argument("--out", help="결과를 저장할 JSON 파일")
+    args = parser.parse_args()
+    runs = args.runs or (BASELINE_RUNS if args.save_baseline else 1)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    cases = (append_rows_cases(sizes) + status_filter_cases(sizes) + dedup_cases()
+             + classify_cases() + extract_cases())
+    if args.keyword:
+        cases = [c for c in cases if args.keyword in c[0]]
+
+    try:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    except (OSError, ValueError):
+        baseline = {}
+
+    # 여러 번 돌리면 기준값 저장은 가장 느린 실행을(다른 날 돌려도 넘지 않도록), 비교는 가장 빠른 실행을 씁니다.
+    pick = max if args.save_baseline else min
+    runs_results = {}
+    for run in range(runs):
+        if runs > 1:
+            print(f"\n▶ {run + 1}/{runs}번째 실행")
+        print(f"{'case':<36}{'ms':>11}{'peak KB':>11}{'baseline ms':>13}{'ratio':>8}")
+        for name, setup, func in cases:
+            # 케이스 안의 진행 로그(상태 인덱스 등)는 표를 가리지 않도록 숨깁니다.
+            stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+            try:
+                r = measure(setup, func)
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            runs_results.setdefault(name, []).append(r)
+            base = baseline.get(name)
+            ratio = f"{r['ms'] / base['ms']:.2f}x" if base and base["ms"] else "-"
+            base_ms = f"{base['ms']:.2f}" if base else "-"
+            print(f"{name:<36}{r['ms']:>11.2f}{r['peak_kb']:>11.0f}{base_ms:>13}{ratio:>8}")
+    results = {
+        name: {"ms": pick(r["ms"] for r in rs), "peak_kb": pick(r["peak_kb"] for r in rs),
+               "repeats": sum(r["repeats"] for r in rs)}
+        for name, rs in runs_results.items()
+    }
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        stored = {k: v for k, v in results.items() if not k.startswith("extract.recorded.")}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": f"{platform.system()} {platform.machine()}",
+                "saved_at": time.strftime("%Y-%m-%d"),
+                "runs": runs,
+                "results": stored,
+            }, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n💾 기준값 저장: {args.baseline} ({len(stored)}개 케이스)")
+        return 0
+
+    if not baseline:
+        print("\nℹ️ 저장된 기준값이 없어 비교하지 않았습니다 (--save-baseline으로 저장).")
+        return 0
+    failures = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    if failures:
+        print(f"\n❌ 기준값 대비 성능 저하 {len(failures)}건:")
+        for line in failures:
+            print(f"   - {line}")
+        return 1
+    print("\n✅ 기준값 대비 성능 저하 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    finally:
+        shutil.rmtree(BENCH_CACHE_DIR, ignore_errors=True)
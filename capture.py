@@ -0,0 +1,283 @@
+import os
+import re
+import json
+import gzip
+import time
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# =========================================================
+# [공통] 수집 페이지 기록/재생 (capture)
+# 스크래퍼·본문 추출을 손볼 때마다 다섯 사이트에 실제로 접속하면 느리고, 결과가 매번 달라지고,
+# 오프라인에서는 아예 확인할 수 없습니다.
+# - CAPTURE_MODE=record: 스크롤이 끝난 목록 페이지의 렌더링된 DOM(listing)과
+#   정적 수집·sender 본문 수집에서 받은 원본 응답(page)을 gzip으로 CAPTURE_DIR에 저장합니다.
+# - CAPTURE_MODE=replay: 같은 코드 경로가 실제 사이트 대신 로컬 서버(127.0.0.1)에서
+#   저장한 응답을 받습니다. 네트워크 없이 버전 간 추출 속도와 결과를 비교할 수 있습니다.
+# 사용법:
+#   CAPTURE_MODE=record python surfit_scraper.py        # 평소처럼 실행하면서 기록
+#   python capture.py list                              # 저장된 항목 보기
+#   python capture.py scrape surfit side --out a.json   # 목록 수집 재생 (브라우저 필요)
+#   python capture.py pages --out b.json                # sender 본문 추출 재생
+# =========================================================
+MODE = os.environ.get("CAPTURE_MODE", "").strip().lower()
+RECORD = MODE == "record"
+REPLAY = MODE == "replay"
+CAPTURE_DIR = os.environ.get("CAPTURE_DIR", "fixtures")
+INDEX_NAME = "index.json"
+
+_lock = threading.Lock()
+_index = None
+_server = None
+
+_SCRIPT_RE = re.compile(r"<script\b[^>]*>.*?</script\s*>", re.I | re.S)
+_HEAD_RE = re.compile(r"<head\b[^>]*>", re.I)
+
+
+def _key(kind, url):
+    return hashlib.sha1(f"{kind} {url}".encode("utf-8")).hexdigest()[:16]
+
+
+def _index_path():
+    return os.path.join(CAPTURE_DIR, INDEX_NAME)
+
+
+def load_index():
+    # 캡처 목록: "<kind> <url>" -> {kind, url, file, content_type, bytes, captured_at, extract}
+    global _index
+    with _lock:
+        if _index is None:
+            try:
+                with open(_index_path(), encoding="utf-8") as f:
+                    _index = json.load(f)
+            except (OSError, ValueError):
+                _index = {}
+        return _index
+
+
+def get(kind, url):
+    return load_index().get(f"{kind} {url}")
+
+
+def has(kind, url):
+    return get(kind, url) is not None
+
+
+def read_body(entry):
+    with gzip.open(os.path.join(CAPTURE_DIR, entry["file"]), "rb") as f:
+        return f.read()
+
+
+# ---------- 기록 ----------
+def save(kind, url, body, content_type="text/html; charset=utf-8", extract=None):
+    """
+    응답 본문(bytes 또는 str)을 gzip으로 저장하고 목록에 올립니다. 같은 URL은 덮어씁니다.
+    extract에는 sender의 추출 설정(태그·min_len·budget)을 남겨 pages 재생에서 그대로 씁니다.
+    """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    rel_path = os.path.join(kind, _key(kind, url) + ".gz")
+    path = os.path.join(CAPTURE_DIR, rel_path)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path, "wb", compresslevel=6) as f:
+            f.write(body)
+    except OSError as e:
+        print(f"⚠️ 캡처 저장 실패 ({url}): {e}")
+        return
+
+    index = load_index()
+    with _lock:
+        index[f"{kind} {url}"] = {
+            "kind": kind, "url": url, "file": rel_path, "content_type": content_type or "",
+            "bytes": len(body), "captured_at": datetime.now().isoformat(timespec="seconds"),
+            "extract": extract,
+        }
+        # 여러 워커가 동시에 기록하므로 잠금 안에서 임시 파일로 쓰고 교체합니다.
+        tmp_path = _index_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, _index_path())
+
+
+def save_listing(driver, url):
+    # 스크롤이 끝난 목록 페이지의 DOM을 기록합니다 (record 모드가 아니면 아무것도 하지 않음).
+    if RECORD:
+        save("listing", url, driver.page_source)
+
+
+def save_response(url, resp, extract=None):
+    if RECORD:
+        settings = None
+        if extract is not None and hasattr(extract, "tags"):
+            settings = {"tags": list(extract.tags), "min_len": extract.min_len, "budget": extract.budget}
+        save("page", url, resp.content, resp.headers.get("Content-Type"), settings)
+
+
+# ---------- 재생 (로컬 서버) ----------
+def _listing_html(entry, body):
+    # 렌더링이 끝난 DOM이므로 스크립트는 빼고(다시 실행되면 네트워크 요청·DOM 교체가 일어남),
+    # 상대 링크가 원래 사이트 주소로 풀리도록 <base>를 넣습니다.
+    html = _SCRIPT_RE.sub("", body.decode("utf-8", errors="replace"))
+    base = f'<base href="{entry["url"]}">'
+    html, count = _HEAD_RE.subn(lambda m: m.group(0) + base, html, count=1)
+    if not count:
+        html = base + html
+    return html.encode("utf-8")
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        entry = _served.get(self.path)
+        if entry is None:
+            self.send_error(404, "not captured")
+            return
+        body = read_body(entry)
+        content_type = entry["content_type"] or "text/html; charset=utf-8"
+        if entry["kind"] == "listing":
+            body, content_type = _listing_html(entry, body), "text/html; charset=utf-8"
+        # 실제 사이트처럼 압축 응답을 보내 스트리밍 추출(압축 해제 포함)도 같은 경로로 측정합니다.
+        payload = gzip.compress(body, compresslevel=1)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass    # 요청마다 로그를 찍지 않습니다.
+
+
+_served = {}    # 서버 경로 -> 캡처 항목
+
+
+def _start_server():
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("127.0.0.1", 0), _ReplayHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="capture-replay", daemon=True).start()
+            print(f"📼 캡처 재생 서버: http://127.0.0.1:{_server.server_port} ({CAPTURE_DIR})")
+        return _server
+
+
+def replay_url(kind, url):
+    # 저장된 응답을 내주는 로컬 서버 주소 (캡처가 없으면 404를 돌려주는 주소)
+    server = _start_server()
+    path = f"/{kind}/{_key(kind, url)}"
+    entry = get(kind, url)
+    if entry is not None:
+        _served[path] = entry
+    return f"http://127.0.0.1:{server.server_port}{path}"
+
+
+def listing_url(url):
+    return replay_url("listing", url) if REPLAY else url
+
+
+def page_url(url):
+    return replay_url("page", url) if REPLAY else url
+
+
+# =========================================================
+# 명령줄: 캡처 목록 보기, 목록 수집·본문 추출 재생
+# =========================================================
+def _write_output(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    print(f"💾 결과 저장: {path}")
+
+
+def _compare(path, data):
+    # 다른 버전에서 만든 결과 파일과 키별로 비교합니다.
+    with open(path, encoding="utf-8") as f:
+        other = json.load(f)
+    changed = sorted(k for k in set(data) | set(other) if data.get(k) != other.get(k))
+    print(f"🔀 {path}와 비교: {len(data)}건 중 {len(changed)}건 다름")
+    for key in changed[:20]:
+        print(f"   - {key}")
+
+
+def cmd_list(args):
+    index = load_index()
+    if not index:
+        return print(f"ℹ️ {CAPTURE_DIR}에 저장된 캡처가 없습니다.")
+    summary = {}
+    for entry in index.values():
+        s = summary.setdefault((entry["kind"], urlparse(entry["url"]).netloc), [0, 0])
+        s[0] += 1
+        s[1] += entry["bytes"]
+    for (kind, host), (count, size) in sorted(summary.items()):
+        print(f"{kind:<8} {host:<28} {count:>5}건 {size / 1024:>9.1f}KB")
+
+
+def cmd_scrape(args):
+    import importlib
+    from scraper_utils import get_driver
+
+    driver = get_driver()
+    results = {}
+    try:
+        for site in args.sites:
+            module = importlib.import_module(f"{site}_scraper")
+            started = time.perf_counter()
+            items = module.scrape_projects(driver)
+            print(f"⏱️ {site}: {len(items)}건 / {time.perf_counter() - started:.2f}초")
+            for item in items:
+                results[item["url"]] = {k: v for k, v in item.items() if k != "scraped_at"}
+    finally:
+        driver.quit()
+    if args.out: _write_output(args.out, results)
+    if args.compare: _compare(args.compare, results)
+
+
+def cmd_pages(args):
+    import requests
+    from text_extract import BlockExtractor
+
+    entries = [e for e in load_index().values() if e["kind"] == "page" and e.get("extract")]
+    if args.host:
+        entries = [e for e in entries if args.host in urlparse(e["url"]).netloc]
+    session = requests.Session()
+    results, elapsed = {}, []
+    for entry in entries:
+        extract = BlockExtractor(**entry["extract"])
+        started = time.perf_counter()
+        # sender(http_cache.fetch_text)와 같이 스트리밍으로 받으면서 추출합니다.
+        resp = session.get(replay_url("page", entry["url"]), timeout=15, stream=not args.no_stream)
+        resp.raise_for_status()
+        text = extract.from_response(resp)[0] if not args.no_stream else extract(resp.text)
+        elapsed.append(time.perf_counter() - started)
+        results[entry["url"]] = text
+    if not elapsed:
+        return print("ℹ️ 재생할 본문 캡처가 없습니다. sender를 CAPTURE_MODE=record로 실행해 주세요.")
+    elapsed.sort()
+    print(f"⏱️ 본문 {len(elapsed)}건: 합계 {sum(elapsed):.2f}초 / "
+          f"p50 {elapsed[len(elapsed) // 2] * 1000:.1f}ms / 최대 {elapsed[-1] * 1000:.1f}ms")
+    if args.out: _write_output(args.out, results)
+    if args.compare: _compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    # 명령줄 재생은 항상 캡처에서 읽습니다 (불러오는 스크래퍼 모듈도 재생 모드로 동작).
+    os.environ["CAPTURE_MODE"] = "replay"
+    parser = argparse.ArgumentParser(description="수집 페이지 캡처를 보고, 네트워크 없이 재생합니다.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="저장된 캡처 목록")
+    scrape_parser = sub.add_parser("scrape", help="목록 페이지 캡처로 scrape_projects 재생")
+    scrape_parser.add_argument("sites", nargs="+", help="사이트 이름 (side, letspl, offercent, surfit, mix)")
+    pages_parser = sub.add_parser("pages", help="상세 페이지 캡처로 sender 본문 추출 재생")
+    pages_parser.add_argument("--host", help="이 문자열이 들어간 호스트만")
+    pages_parser.add_argument("--no-stream", action="store_true", help="본문을 모두 받은 뒤 추출")
+    for p in (scrape_parser, pages_parser):
+        p.add_argument("--out", help="결과를 저장할 JSON 파일")
+        p.add_argument("--compare", help="다른 버전에서 저장한 결과 JSON과 비교")
+    args = parser.parse_args()
+
+    {"list": cmd_list, "scrape": cmd_scrape, "pages": cmd_pages}[args.command](args)
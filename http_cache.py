@@ -0,0 +1,167 @@
+import os
+import time
+import zlib
+import sqlite3
+import threading
+from urllib3.util import make_headers
+from sheet_utils import CACHE_DIR
+from run_report import span
+import capture
+
+# =========================================================
+# [공통] 상세 페이지 HTTP 캐시 (URL 기준, 디스크 저장)
+# 실패해서 'archived'로 남은 행은 다음 실행에서 같은 URL을 다시 받게 되는데,
+# 본문·ETag/Last-Modified·추출한 텍스트를 SQLite에 남겨 두면
+# 재시도 때는 네트워크 요청도, 예의 대기(sleep)도 없이 텍스트를 돌려줄 수 있습니다.
+# - FRESH_FOR 이내: 캐시를 그대로 사용 (요청 없음)
+# - 그 이후: If-None-Match / If-Modified-Since로 재검증, 304면 캐시 재사용
+# - 전체 크기가 MAX_BYTES를 넘으면 가장 오래 쓰지 않은 항목부터 삭제 (LRU)
+# =========================================================
+CACHE_PATH = os.path.join(CACHE_DIR, "http_cache.sqlite3")
+FRESH_FOR = 3 * 24 * 60 * 60
+MAX_BYTES = 200 * 1024 * 1024
+# gzip/deflate와 (brotli 패키지가 설치되어 있으면) br 압축 응답을 요청합니다.
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+
+_lock = threading.Lock()
+_cache = None
+
+
+class HttpCache:
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES, fresh_for=FRESH_FOR):
+        self.max_bytes = max_bytes
+        self.fresh_for = fresh_for
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.hits = self.revalidated = self.misses = 0
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " url TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT,"
+                " text TEXT, text_key TEXT, fetched_at REAL NOT NULL, used_at REAL NOT NULL,"
+                " size INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)")
+            self._conn.commit()
+
+    def _get(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, text, text_key, fetched_at FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, text, text_key, fetched_at = row
+        return {
+            "body": body, "etag": etag, "last_modified": last_modified,
+            "text": text, "text_key": text_key, "fetched_at": fetched_at,
+        }
+
+    def _touch(self, url, fetched_at=None, text=None, text_key=None):
+        with self._lock:
+            if fetched_at is not None:
+                self._conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (fetched_at, url))
+            if text is not None:
+                self._conn.execute("UPDATE responses SET text = ?, text_key = ? WHERE url = ?", (text, text_key, url))
+            self._conn.execute("UPDATE responses SET used_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def _put(self, url, html, etag, last_modified, text, text_key):
+        body = zlib.compress(html.encode("utf-8"))
+        size = len(body) + len(text.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, text, text_key, now, now, size),
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self):
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self.max_bytes:
+            return
+        for url, size in self._conn.execute("SELECT url, size FROM responses ORDER BY used_at").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def fetch_text(self, session, url, extract, headers=None, timeout=15, throttle=None, text_key="", stream=False):
+        """
+        url의 본문에서 extract(html)로 뽑은 텍스트를 반환합니다.
+        session은 requests.Session 또는 requests 모듈, throttle은 실제 요청 직전에만 wait합니다.
+        text_key는 추출 방식이 바뀌었을 때 저장된 본문에서 텍스트만 다시 뽑기 위한 구분값입니다.
+        stream=True이고 extract에 from_response가 있으면(text_extract.BlockExtractor) 본문을 받으면서
+        추출하고, 충분히 모이면 나머지는 받지 않습니다 (캐시에는 실제로 받은 부분만 저장).
+        """
+        if capture.REPLAY:
+            return self._replay_text(session, url, extract, headers, timeout, stream)
+        # 기록 모드에서는 캡처에 전체 원본 응답이 남도록 캐시를 건너뛰고 끝까지 받습니다.
+        entry = None if capture.RECORD else self._get(url)
+
+        if entry and time.time() - entry["fetched_at"] < self.fresh_for:
+            self.hits += 1
+            return self._cached_text(url, entry, extract, text_key)
+
+        request_headers = dict(headers or {})
+        request_headers.setdefault("Accept-Encoding", ACCEPT_ENCODING)
+        if entry:
+            if entry["etag"]: request_headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]: request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        if throttle: throttle.wait(url)
+        stream = stream and hasattr(extract, "from_response") and not capture.RECORD
+        with span("http_get"):
+            resp = session.get(url, headers=request_headers, timeout=timeout, stream=stream)
+
+        if entry and resp.status_code == 304:
+            resp.close()
+            self.revalidated += 1
+            self._touch(url, fetched_at=time.time())
+            return self._cached_text(url, entry, extract, text_key)
+
+        resp.raise_for_status()
+        self.misses += 1
+        capture.save_response(url, resp, extract)
+        # 스트리밍이면 남은 본문 수신과 추출이 함께 측정됩니다.
+        with span("extract"):
+            if stream:
+                text, html = extract.from_response(resp)
+            else:
+                html = resp.text
+                text = extract(html)
+        self._put(url, html, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), text, text_key)
+        return text
+
+    def _replay_text(self, session, url, extract, headers, timeout, stream):
+        # 캡처한 응답을 로컬 서버에서 받아 추출만 합니다 (캐시·대기 없이, 매번 같은 입력).
+        stream = stream and hasattr(extract, "from_response")
+        with span("http_get"):
+            resp = session.get(capture.page_url(url), headers=headers, timeout=timeout, stream=stream)
+        resp.raise_for_status()
+        with span("extract"):
+            return extract.from_response(resp)[0] if stream else extract(resp.text)
+
+    def _cached_text(self, url, entry, extract, text_key):
+        if entry["text"] is not None and entry["text_key"] == text_key:
+            self._touch(url)
+            return entry["text"]
+        text = extract(zlib.decompress(entry["body"]).decode("utf-8"))
+        self._touch(url, text=text, text_key=text_key)
+        return text
+
+    def stats(self):
+        return f"📦 HTTP 캐시: 적중 {self.hits}건 / 재검증(304) {self.revalidated}건 / 새로 받음 {self.misses}건"
+
+
+def get_cache():
+    # 한 프로세스의 fetch 워커들이 같은 캐시(연결)를 공유합니다.
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
@@ -1,12 +1,13 @@
-import os, sys, time, json, re
-import gspread
+import sys, time, re
 from datetime import datetime
-from oauth2client.service_account import ServiceAccountCredentials
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+import sheet_utils
+import run_report
+import capture
+from run_report import record, span
+from scraper_utils import get_driver, wait_for_cards, append_new_rows, ResultCollector
 
 # [설정]
 CONFIG = {
@@ -15,45 +16,43 @@ CONFIG = {
     "gid": "1669656972"
 }
 
+# 카드 텍스트에서 처음 발견되는 지역명을 location으로 씁니다 (없으면 "미정").
+REGIONS = ["서울", "경기", "인천", "대전", "대구", "부산", "광주", "울산", "세종", "강원", "충북", "충남", "전북", "전남", "경북", "경남", "제주", "온라인", "지역무관"]
+
 # [공통] 시트 연결
 def get_worksheet():
-    scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-    creds_dict = json.loads(os.environ['GOOGLE_CREDENTIALS'])
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-    client = gspread.authorize(creds)
-    spreadsheet = client.open_by_url("https://docs.google.com/spreadsheets/d/1nKPVCZ6zAOfpqCjV6WfjkzCI55FA9r2yvi9XL3iIneo/edit")
-    sheet = next((s for s in spreadsheet.worksheets() if str(s.id) == CONFIG["gid"]), None)
-    if not sheet: raise Exception(f"{CONFIG['gid']} 시트를 못 찾았습니다.")
-    return sheet
-
-# [공통] 브라우저 실행
-def get_driver():
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    driver = webdriver.Chrome(options=options)
-    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"})
-    return driver
+    # 인증과 탭 목록(gid 매핑)은 sheet_utils에서 한 번만 조회해 공유합니다.
+    return sheet_utils.get_worksheet(CONFIG["gid"])
 
 # [전용] 데이터 수집
-def scrape_projects():
-    driver = get_driver()
-    new_data = []
+def scrape_projects(driver=None):
+    # 러너가 넘겨준 브라우저(탭)가 있으면 재사용하고, 없으면 직접 띄웁니다.
+    own_driver = driver is None
+    if own_driver: driver = get_driver()
+    collector = ResultCollector()
     today = datetime.now().strftime("%Y-%m-%d")
-    REGIONS = ["서울", "경기", "인천", "대전", "대구", "부산", "광주", "울산", "세종", "강원", "충북", "충남", "전북", "전남", "경북", "경남", "제주", "온라인", "지역무관"]
 
     try:
         print(f"🌐 {CONFIG['name']} 접속 중...")
-        driver.get(CONFIG["url"])
-        wait = WebDriverWait(driver, 15)
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "a[href^='/project/']")))
+        with span("page_load"):
+            driver.get(capture.listing_url(CONFIG["url"]))
+            wait = WebDriverWait(driver, 15)
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "a[href^='/project/']")))
         
-        time.sleep(5) 
+        # 카드 개수가 더 이상 늘지 않으면 바로 진행 (최대 10초)
+        wait_for_cards(driver, "a[href^='/project/']", timeout=10)
         
+        capture.save_listing(driver, CONFIG["url"])
+        extract_started = time.perf_counter()
         cards = driver.find_elements(By.CSS_SELECTOR, "a[href^='/project/']")
 
         for elem in cards:
             try:
+                # 0. 링크 패턴 확인 및 중복 카드는 다른 요소 작업 전에 제외
+                href = elem.get_attribute("href")
+                if not href or not re.search(r'/project/\d+', href): continue
+                if href in collector: continue
+
                 # 1. 캐로셀(주목중) 카드 제외
                 card_class = elem.get_attribute("class") or ""
                 if "Comment" in card_class or "newProject" in card_class:
@@ -72,9 +71,6 @@ def scrape_projects():
                     # 직무 정보 요소가 아예 없는 카드라면 스킵
                     continue
                 # ---------------------------------------
-
-                href = elem.get_attribute("href")
-                if not re.search(r'/project/\d+', href): continue
                 
                 # 2. 제목 찾기 로직
                 title = ""
@@ -93,39 +89,23 @@ def scrape_projects():
 
                 loc = next((k for k in REGIONS if k in elem.text), "미정")
                 
-                if not any(d['url'] == href for d in new_data):
-                    new_data.append({'title': title, 'url': href, 'scraped_at': today, 'location': loc})
+                collector.add({'title': title, 'url': href, 'scraped_at': today, 'location': loc})
             except Exception as e:
                 # 개별 카드 처리 중 오류 시 다음 카드로 진행
                 continue
+        record("extract", time.perf_counter() - extract_started)
     finally: 
-        driver.quit()
-    return new_data
+        if own_driver: driver.quit()
+    return collector.items()
 # [공통] 스마트 저장
 def update_sheet(ws, data):
     if not data: return print(f"[{CONFIG['name']}] 새 데이터 없음")
-    all_v = ws.get_all_values()
-    headers = all_v[0] if all_v else ['title', 'url', 'scraped_at', 'status', 'location']
-    
-    col_map = {name: i for i, name in enumerate(headers)}
-    if 'url' not in col_map: return print("❌ 'url' 컬럼을 찾을 수 없습니다.")
-
-    existing_urls = {row[col_map['url']] for row in all_v[1:] if len(row) > col_map['url']}
-    
-    rows = []
-    for item in data:
-        if item['url'] in existing_urls: continue
-        row = [''] * len(headers)
-        for k, v in item.items():
-            if k in col_map: row[col_map[k]] = v
-        if 'status' in col_map: row[col_map['status']] = 'archived'
-        rows.append(row)
-    
-    if rows:
-        ws.append_rows(rows)
-        print(f"💾 {CONFIG['name']} {len(rows)}건 저장 완료!")
+    # 중복 판정은 로컬 URL 인덱스로 하고, 시트에는 새 행만 추가합니다.
+    count = append_new_rows(ws, data, CONFIG["gid"], ['title', 'url', 'scraped_at', 'status', 'location'])
+    if count: print(f"💾 {CONFIG['name']} {count}건 저장 완료!")
 
 if __name__ == "__main__":
+    run_report.start()
     try:
         ws = get_worksheet()
         data = scrape_projects()
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from sheet_utils import CACHE_DIR
+from rate_limiter import get_limiter
+from run_report import span
+
+# =========================================================
+# [공통] LLM 결과 캐시 (본문 해시 기준, 디스크 저장)
+# 같은 공고·글이 다른 URL로 다시 올라오거나 실패 행을 재시도할 때
+# 동일한 본문으로 gpt를 다시 호출하지 않도록, 파싱한 JSON 결과를
+# (모델, 프롬프트 이름·버전, 프롬프트 틀, 본문 sha256) 키로 저장합니다.
+# 프롬프트 틀은 본문을 뺀 프롬프트·시스템 메시지의 해시라서 문구를 고치면 자동으로 새 키가 되고,
+# 문구 변경 없이 결과를 새로 받고 싶을 때는 각 sender의 *_PROMPT_VERSION을 올립니다.
+# =========================================================
+CACHE_PATH = os.path.join(CACHE_DIR, "llm_cache.sqlite3")
+LLM_CACHE_TTL = 30 * 24 * 60 * 60
+MAX_ENTRIES = 5000
+DEFAULT_MODEL = "gpt-4o-mini"
+
+_lock = threading.Lock()
+_cache = None
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def request_body(model, system, prompt, schema=None):
+    # chat.completions 요청 본문 (동기 호출과 Batch API 요청 파일에서 함께 사용)
+    return {
+        "model": model,
+        "response_format": {"type": "json_schema", "json_schema": schema} if schema else {"type": "json_object"},
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ],
+    }
+
+
+def llm_call(name, version, system, prompt, text, model=DEFAULT_MODEL, schema=None):
+    # chat_json 인자 묶음 (동기 호출과 Batch API 제출에서 같은 캐시 키를 쓰도록 공유)
+    return {
+        "name": name, "version": version, "system": system, "prompt": prompt,
+        "text": text, "model": model, "schema": schema,
+    }
+
+
+class LLMCache:
+    def __init__(self, path=CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, name TEXT NOT NULL, result TEXT NOT NULL,"
+                " created_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+            # 만료된 결과는 시작할 때 한 번에 정리합니다.
+            self._conn.execute("DELETE FROM results WHERE created_at < ?", (time.time() - ttl,))
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(model, name, version, system, prompt, text, schema=None):
+        template = text_hash(system + "\x1e" + prompt.replace(text, "") + "\x1e" + json.dumps(schema, sort_keys=True))
+        parts = [model, name, version, template, text_hash(text)]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or time.time() - row[1] > self.ttl:
+                return None
+            self._conn.execute("UPDATE results SET used_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key, name, result):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, name, json.dumps(result, ensure_ascii=False), now, now),
+            )
+            # 개수 상한을 넘으면 가장 오래 쓰지 않은 결과부터 삭제 (LRU)
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                " SELECT key FROM results ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def chat_json(self, client, name, version, system, prompt, text, model=DEFAULT_MODEL, schema=None):
+        """
+        캐시에 결과가 있으면 바로 반환하고, 없을 때만 JSON 모드로 chat.completions를 호출합니다.
+        text는 prompt에 들어간 본문(truncated_text)으로, 캐시 키를 만드는 데만 사용됩니다.
+        schema(json_schema 형식)를 주면 응답이 해당 스키마를 따르도록 강제합니다.
+        """
+        key = self.make_key(model, name, version, system, prompt, text, schema)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        # 동시에 도는 LLM 워커들이 openai 요청 한도를 공유하고, 429는 Retry-After만큼만 기다려 재시도합니다.
+        with span(f"llm.{name}"):
+            res = get_limiter("openai").call(client.chat.completions.create, **request_body(model, system, prompt, schema))
+        result = json.loads(res.choices[0].message.content)
+        self.put(key, name, result)
+        return result
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = f"{self.hits / total:.0%}" if total else "-"
+        return f"🧠 LLM 캐시: 적중 {self.hits}건 / 호출 {self.misses}건 (적중률 {rate})"
+
+
+# =========================================================
+# [공통] 프롬프트 조립
+# 각 sender의 판단·요약 지침(*_GUIDE)은 본문 없이 보관하고, 호출할 때 본문을 붙입니다.
+# 통합 모드에서는 두 지침을 한 프롬프트로 묶어 본문을 한 번만 보내고,
+# 스키마로 is_appropriate와 요약 항목을 한 번에 받습니다.
+# =========================================================
+def with_content(guide, text, label="[내용]"):
+    return f"""{guide.rstrip()}
+
+    {label}
+    {text}
+    """
+
+
+def build_combined_prompt(identity_guide, summary_guide, text, label="[내용]"):
+    return with_content(f"""
+    아래 두 작업을 한 번에 수행하고, 하나의 JSON 객체로 답해 주세요.
+    [작업 2]는 [작업 1]의 is_appropriate가 true일 때만 작성하고, false라면 나머지 항목은 빈 값으로 두세요.
+
+    ===== [작업 1: 적합성 판단] =====
+    {identity_guide.strip()}
+
+    ===== [작업 2: 소개 작성] =====
+    {summary_guide.strip()}
+    """, text, label)
+
+
+def combined_schema(list_fields=(), text_fields=()):
+    # is_appropriate·reason에 sender별 요약 항목(목록/문자열)을 더한 strict 스키마
+    properties = {"is_appropriate": {"type": "boolean"}, "reason": {"type": "string"}}
+    for field in list_fields:
+        properties[field] = {"type": "array", "items": {"type": "string"}}
+    for field in text_fields:
+        properties[field] = {"type": "string"}
+    return {
+        "name": "identity_and_summary",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": properties,
+            "required": list(properties),
+            "additionalProperties": False,
+        },
+    }
+
+
+def get_llm_cache():
+    # 한 프로세스의 LLM 워커들이 같은 캐시(연결)를 공유합니다.
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
@@ -1,67 +1,78 @@
-import os, time, json, re
-import gspread
+import time
 from datetime import datetime
-from oauth2client.service_account import ServiceAccountCredentials
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin
+import sheet_utils
+import run_report
+import capture
+from run_report import record, span
+from scraper_utils import get_driver, fetch_html, scrape_with_strategy, scroll_and_wait, append_new_rows, ResultCollector
 
 # [설정] 이 파일 전용 정보
 CONFIG = {
     "name": "Mix.day",
     "url": "https://mix.day/",
-    "gid": "981623942" # Mix 탭
+    "gid": "981623942", # Mix 탭
+    "fetch": "auto" # 카드가 정적 HTML에 있으면 브라우저 없이 수집
 }
 
 # [공통] 시트 연결 (GID로 찾기)
 def get_worksheet():
-    scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-    creds_dict = json.loads(os.environ['GOOGLE_CREDENTIALS'])
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-    client = gspread.authorize(creds)
-    spreadsheet = client.open_by_url("https://docs.google.com/spreadsheets/d/1nKPVCZ6zAOfpqCjV6WfjkzCI55FA9r2yvi9XL3iIneo/edit")
-    # 순서가 바뀌어도 ID로 탭을 찾음
-    sheet = next((s for s in spreadsheet.worksheets() if str(s.id) == CONFIG["gid"]), None)
-    if not sheet: raise Exception(f"{CONFIG['gid']} 시트를 못 찾았습니다.")
-    return sheet
+    # 인증과 탭 목록(gid 매핑)은 sheet_utils에서 한 번만 조회해 공유합니다.
+    return sheet_utils.get_worksheet(CONFIG["gid"])
 
-# [공통] 브라우저 실행
-def get_driver():
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    driver = webdriver.Chrome(options=options)
-    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"})
-    return driver
+# [전용] 데이터 수집 (정적 HTML 우선, 실패 시 브라우저)
+def scrape_projects(driver=None):
+    return scrape_with_strategy(CONFIG, scrape_static, scrape_browser, driver)
 
-# [전용] 데이터 수집
-def scrape_projects():
-    driver = get_driver()
-    new_data = []
+# [전용] 정적 수집: requests + BeautifulSoup
+def scrape_static():
+    collector = ResultCollector()
+    today = datetime.now().strftime("%Y-%m-%d")
+    soup = BeautifulSoup(fetch_html(CONFIG["url"]), 'html.parser')
+
+    for art in soup.find_all("article"):
+        # 제목: 'line-clamp-2' 클래스를 포함한 span 태그
+        title_elem = art.select_one("span.line-clamp-2")
+        # 링크: 카드를 감싼 상위 a 태그, 없으면 article 내부의 a 태그
+        link_elem = art.find_parent("a", href=True) or art.find("a", href=True)
+        if not title_elem or not link_elem: continue
+
+        url = urljoin(CONFIG["url"], link_elem['href'])
+        if url in collector: continue
+        title = title_elem.get_text(strip=True)
+        if title and url and "http" in url:
+            collector.add({'title': title, 'url': url, 'scraped_at': today})
+    return collector.items()
+
+# [전용] 브라우저 수집
+def scrape_browser(driver=None):
+    # 러너가 넘겨준 브라우저(탭)가 있으면 재사용하고, 없으면 직접 띄웁니다.
+    own_driver = driver is None
+    if own_driver: driver = get_driver()
+    collector = ResultCollector()
     today = datetime.now().strftime("%Y-%m-%d")
     try:
-        driver.get(CONFIG["url"])
-        # 카드 요소가 로드될 때까지 대기
-        wait = WebDriverWait(driver, 15)
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "article")))
+        with span("page_load"):
+            driver.get(capture.listing_url(CONFIG["url"]))
+            # 카드 요소가 로드될 때까지 대기
+            wait = WebDriverWait(driver, 15)
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "article")))
 
-        # Mix.day는 무한 스크롤이 있을 수 있으므로 약간의 스크롤 수행
-        for _ in range(3):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+        # Mix.day는 무한 스크롤이 있을 수 있으므로 약간의 스크롤 수행 (새 카드가 없으면 바로 중단)
+        scroll_and_wait(driver, "article", max_scrolls=3, step_timeout=2)
         
+        capture.save_listing(driver, CONFIG["url"])
         # 1. 각 콘텐츠 카드(article) 추출
+        extract_started = time.perf_counter()
         articles = driver.find_elements(By.CSS_SELECTOR, "article")
         
         for art in articles:
             try:
-                # 2. 제목 추출: 'line-clamp-2' 클래스를 포함한 span 태그가 제목임
-                title_elem = art.find_element(By.CSS_SELECTOR, "span.line-clamp-2")
-                title = title_elem.text.strip()
-                
-                # 3. 링크 추출: Mix.day는 카드 전체 클릭 방식인 경우가 많음
+                # 2. 링크 추출: Mix.day는 카드 전체 클릭 방식인 경우가 많음
                 # 만약 article 자체가 링크가 아니라면 내부의 hidden link나 특정 요소를 찾아야 함
                 # 현재 구조에서는 클릭 시 이동하는 URL을 잡기 위해 상위 a 태그나 script 경로 확인 필요
                 # 일단 href가 포함된 가장 가까운 a 태그를 찾음
@@ -71,32 +82,29 @@ def scrape_projects():
                     # article 내부에 a 태그가 따로 있는 경우
                     url = art.find_element(By.CSS_SELECTOR, "a").get_attribute("href")
 
-                if title and url and "http" in url:
-                    if not any(d['url'] == url for d in new_data):
-                        new_data.append({'title': title, 'url': url, 'scraped_at': today})
+                # 이미 모은 카드는 제목을 읽기 전에 건너뜀
+                if not url or "http" not in url or url in collector: continue
+
+                # 3. 제목 추출: 'line-clamp-2' 클래스를 포함한 span 태그가 제목임
+                title_elem = art.find_element(By.CSS_SELECTOR, "span.line-clamp-2")
+                title = title_elem.text.strip()
+
+                if title:
+                    collector.add({'title': title, 'url': url, 'scraped_at': today})
             except Exception as e:
                 continue
+        record("extract", time.perf_counter() - extract_started)
                 
-    finally: driver.quit()
-    return new_data
+    finally:
+        if own_driver: driver.quit()
+    return collector.items()
 # [공통] 스마트 저장 (헤더 이름 기준)
 def update_sheet(ws, data):
     if not data: return print(f"[{CONFIG['name']}] 새 공고 없음")
-    all_v = ws.get_all_values()
-    headers = all_v[0] if all_v else ['title', 'url', 'scraped_at', 'status', 'location']
-    col_map = {name: i for i, name in enumerate(headers)}
-    existing_urls = {row[col_map['url']] for row in all_v[1:] if len(row) > col_map['url']}
-    
-    rows = []
-    for item in data:
-        if item['url'] in existing_urls: continue
-        row = [''] * len(headers)
-        for k, v in item.items():
-            if k in col_map: row[col_map[k]] = v
-        if 'status' in col_map: row[col_map['status']] = 'archived'
-        rows.append(row)
-    
-    if rows: ws.append_rows(rows); print(f"💾 {CONFIG['name']} {len(rows)}건 저장")
+    # 중복 판정은 로컬 URL 인덱스로 하고, 시트에는 새 행만 추가합니다.
+    count = append_new_rows(ws, data, CONFIG["gid"], ['title', 'url', 'scraped_at', 'status', 'location'])
+    if count: print(f"💾 {CONFIG['name']} {count}건 저장")
 
 if __name__ == "__main__":
+    run_report.start()
     ws = get_worksheet(); data = scrape_projects(); update_sheet(ws, data)
@@ -0,0 +1,177 @@
+import os
+import re
+import glob
+import time
+import sqlite3
+import hashlib
+import threading
+from sheet_utils import CACHE_DIR
+
+# =========================================================
+# [공통] 소스 간 유사 중복 감지 (MinHash)
+# 같은 모집 공고·아티클이 여러 소스(sideproject와 letspl, surfit과 mix 등)에 다른 URL로 올라오면
+# 소스마다 본문 수집·LLM 호출·슬랙 전송을 따로 거칩니다.
+# 정규화한 제목과 추출한 본문의 단어 묶음으로 MinHash 지문을 만들어 모든 sender가 함께 쓰는 인덱스에 남기고,
+# 다른 소스에서 이미 게시(published)·제외(dropped)된 글과 추정 유사도(Jaccard)가 THRESHOLD 이상이면
+# LLM 호출 없이 'duplicate'로 처리합니다.
+# 소스마다 붙는 메뉴·푸터 문구만큼 본문이 조금씩 달라도 공통 부분의 비율로 판단하므로 잡아낼 수 있고,
+# 지문을 BANDS개 구간으로 나눠 구간별로 색인해 전체를 훑지 않고 후보만 비교합니다.
+# 같은 소스의 글끼리는 비교하지 않습니다 (사이트 공통 문구·템플릿 때문에 서로 다른 글이 비슷하게 나옴).
+# =========================================================
+# 인덱스는 소스별 파일(<INDEX_DIR>/<소스>.sqlite3)로 나눠, 각 sender는 자기 파일에만 쓰고 다른 소스 파일은 읽기만 합니다.
+# 워크플로도 소스별 키로 보존하므로 여러 sender가 동시에 돌아도 서로의 기록을 덮어쓰지 않습니다.
+INDEX_DIR = os.path.join(CACHE_DIR, "shared", "near_dup")
+LEGACY_PATH = os.path.join(CACHE_DIR, "shared", "near_dup.sqlite3")     # 소스별로 나누기 전의 통합 파일 (읽기만)
+NUM_HASHES = 64
+BANDS = 16              # 4개 값씩 16구간: 유사도 0.7인 쌍이 후보에 오를 확률 약 99%
+THRESHOLD = 0.7
+MIN_FEATURES = 30       # 본문이 이보다 짧으면(수집 실패·제목만 있는 글) 오탐을 막기 위해 비교하지 않습니다.
+MAX_AGE = 90 * 24 * 60 * 60
+MATCH_STATUSES = ("published", "dropped")
+
+_WORD_RE = re.compile(r"[0-9a-z가-힣]+")
+_MASK = (1 << 32) - 1
+_ROWS = NUM_HASHES // BANDS
+
+
+def _tokens(text):
+    return _WORD_RE.findall((text or "").lower())
+
+
+def _features(title, text):
+    # 본문은 연속 두 단어 묶음, 제목은 단어 단위 (소문자·기호 제거로 정규화)
+    words = _tokens(text)
+    features = {f"{words[i]} {words[i + 1]}" for i in range(len(words) - 1)}
+    if len(features) < MIN_FEATURES:
+        return None
+    return features | {"t:" + word for word in _tokens(title)}
+
+
+def signature(title, text):
+    """
+    MinHash 지문 (32비트 값 NUM_HASHES개). 특징이 MIN_FEATURES보다 적으면 None을 반환합니다.
+    특징마다 64비트 해시 하나를 두 값(h1, h2)으로 나눠 h1 + i*h2로 NUM_HASHES개의 해시를 만듭니다.
+    """
+    features = _features(title, text)
+    if features is None:
+        return None
+    pairs = []
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        pairs.append((h & _MASK, h >> 32 | 1))
+    return [min((h1 + i * h2) & _MASK for h1, h2 in pairs) for i in range(NUM_HASHES)]
+
+
+def similarity(a, b):
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def _bands(sig):
+    return [(i, tuple(sig[i * _ROWS:(i + 1) * _ROWS])) for i in range(BANDS)]
+
+
+def _encode(sig):
+    return "".join(f"{v:08x}" for v in sig)
+
+
+def _decode(value):
+    return [int(value[i:i + 8], 16) for i in range(0, len(value), 8)]
+
+
+class NearDupIndex:
+    def __init__(self, source, index_dir=INDEX_DIR, threshold=THRESHOLD):
+        self.source = source
+        self.threshold = threshold
+        self.matched = 0
+        os.makedirs(index_dir, exist_ok=True)
+        path = os.path.join(index_dir, f"{source}.sqlite3")
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._entries = {}      # url -> {url, source, title, status, sig}
+        self._buckets = {}      # (구간 번호, 구간 값) -> {url, ...}
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                " url TEXT PRIMARY KEY, source TEXT NOT NULL, title TEXT, status TEXT NOT NULL,"
+                " sig TEXT NOT NULL, at REAL NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM fingerprints WHERE at < ?", (time.time() - MAX_AGE,))
+            self._conn.commit()
+
+        # 다른 소스의 파일(과 이전 통합 파일)에서는 같은 소스가 아닌 최근 지문만 읽어 옵니다.
+        others = [p for p in sorted(glob.glob(os.path.join(index_dir, "*.sqlite3"))) if p != path]
+        if os.path.exists(LEGACY_PATH):
+            others.append(LEGACY_PATH)
+        for other in others:
+            try:
+                conn = sqlite3.connect(f"file:{other}?mode=ro", uri=True)
+                try:
+                    rows = conn.execute(
+                        "SELECT url, source, title, status, sig FROM fingerprints WHERE source != ? AND at >= ?",
+                        (source, time.time() - MAX_AGE),
+                    ).fetchall()
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                print(f"⚠️ 유사 중복 인덱스 읽기 실패 ({other}): {e}")
+                continue
+            for url, src, title, status, sig in rows:
+                self._put({"url": url, "source": src, "title": title, "status": status, "sig": _decode(sig)})
+
+    def _put(self, entry):
+        old = self._entries.get(entry["url"])
+        if old is not None:
+            for band in _bands(old["sig"]):
+                self._buckets.get(band, set()).discard(entry["url"])
+        self._entries[entry["url"]] = entry
+        for band in _bands(entry["sig"]):
+            self._buckets.setdefault(band, set()).add(entry["url"])
+
+    def find(self, sig, exclude_url=None):
+        # 다른 소스에서 게시·제외된 글 중 유사도가 threshold 이상이면서 가장 비슷한 글을 돌려줍니다.
+        with self._lock:
+            candidates = set()
+            for band in _bands(sig):
+                candidates |= self._buckets.get(band, set())
+            candidates.discard(exclude_url)
+            best, best_score = None, self.threshold
+            for url in candidates:
+                entry = self._entries[url]
+                if entry["source"] == self.source:
+                    continue
+                score = similarity(sig, entry["sig"])
+                if score >= best_score and entry["status"] in MATCH_STATUSES:
+                    best, best_score = entry, score
+            return best
+
+    def check(self, item):
+        """
+        fetch 단계에서 본문을 받은 뒤 호출합니다. 지문을 item['fingerprint']에 남기고,
+        이미 처리된 글과 거의 같으면 부적합으로 표시해(duplicate_of) 판단·요약 단계를 건너뛰게 합니다.
+        """
+        sig = signature(item['title'], item.get('text'))
+        if sig is None:
+            return item
+        item['fingerprint'] = _encode(sig)
+        match = self.find(sig, exclude_url=item['url'])
+        if match is not None:
+            self.matched += 1
+            item['is_appropriate'] = False
+            item['duplicate_of'] = match["url"]
+            print(f"♻️ {item['row']}행은 이미 처리된 [{match['source']}] '{match['title']}'와 거의 같아 건너뜁니다.")
+        return item
+
+    def remember(self, item, status):
+        # 게시·제외가 확정된 행의 지문을 자기 소스 파일에 남깁니다 (지문이 없는 행은 무시).
+        # 같은 소스끼리는 비교하지 않으므로 메모리 색인에는 넣지 않습니다.
+        if not item.get('fingerprint'):
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?)",
+                (item['url'], self.source, item['title'], status, item['fingerprint'], time.time()),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        return f"♻️ 유사 중복: {self.matched}건 건너뜀 (인덱스 {len(self._entries)}건)"
@@ -1,12 +1,14 @@
-import os, sys, time, json, re
-import gspread
+import sys
 from datetime import datetime
-from oauth2client.service_account import ServiceAccountCredentials
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+import sheet_utils
+import run_report
+import capture
+from run_report import span
+from seen_index import get_index
+from scraper_utils import get_driver, scroll_and_wait, append_new_rows, ResultCollector
 
 # ==========================================
 # [전용] 설정 정보
@@ -14,119 +16,130 @@ from selenium.webdriver.support import expected_conditions as EC
 CONFIG = {
     "name": "오퍼센트_통합_크롤러",
     "url": "https://offercent.co.kr/list?jobCategories=0040002%2C0170004&sort=recent",
-    "gid": "639559541"
+    "gid": "639559541",
+    # 최신순 목록에서 이미 저장한 공고가 이만큼 연속으로 나오면 스크롤을 멈춤
+    "stop_after_seen": 10
 }
 
 # ==========================================
 # [공통] 구글 스프레드시트 연결 로직
 # ==========================================
 def get_worksheet():
-    scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-    creds_dict = json.loads(os.environ['GOOGLE_CREDENTIALS'])
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-    client = gspread.authorize(creds)
-    spreadsheet = client.open_by_url("https://docs.google.com/spreadsheets/d/1nKPVCZ6zAOfpqCjV6WfjkzCI55FA9r2yvi9XL3iIneo/edit")
-    sheet = next((s for s in spreadsheet.worksheets() if str(s.id) == CONFIG["gid"]), None)
-    if not sheet: raise Exception(f"{CONFIG['gid']} 시트를 못 찾았습니다.")
-    return sheet
+    # 인증과 탭 목록(gid 매핑)은 sheet_utils에서 한 번만 조회해 공유합니다.
+    return sheet_utils.get_worksheet(CONFIG["gid"])
 
 # ==========================================
-# [공통] 셀레니움 브라우저 설정 로직
+# [전용] 카드 일괄 추출 스크립트 (브라우저 안에서 실행)
+# 카드마다 WebDriver 호출을 반복하지 않고, 한 번의 호출로 모든 카드의
+# {href, title, company, info}를 JSON 배열로 돌려받습니다.
+# 이미 돌려준 URL은 브라우저 쪽 Set에 기억해 두어 새 카드만 반환합니다.
 # ==========================================
-def get_driver():
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("window-size=1920,1080")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-    driver = webdriver.Chrome(options=options)
-    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-        "source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
-    })
-    return driver
+EXTRACT_CARDS_JS = """
+const seen = window.__offercentSeen || (window.__offercentSeen = new Set());
+const out = [];
+for (const a of document.querySelectorAll(arguments[0])) {
+    const href = (a.href || '').split('?')[0];
+    const title = (a.innerText || '').trim();
+    if (!href || !title || seen.has(href)) continue;
+
+    // 카드 상위 요소로 최대 5단계 올라가며 회사명(body-02)과 지역/경력(body-03)을 찾음
+    let container = a.parentElement, company = '', info = '';
+    for (let i = 0; i < 5 && container; i++) {
+        const companyEl = container.querySelector('span[data-variant="body-02"]');
+        const infoEl = container.querySelector('span[data-variant="body-03"]');
+        if (companyEl && infoEl) {
+            company = (companyEl.innerText || '').trim();
+            info = (infoEl.innerText || '').trim();
+            break;
+        }
+        container = container.parentElement;
+    }
+    seen.add(href);
+    out.push({href: href, title: title, company: company, info: info});
+}
+return out;
+"""
+
+# [전용] URL 정규화 (추적용 쿼리 파라미터 제거)
+def canonical_url(url):
+    return url.split('?')[0]
+
+# ==========================================
+# [핵심] 키워드 기반 자동 분류 로직 (지역/경력 통합 텍스트 → 지역, 경력)
+# ==========================================
+EXP_KEYWORDS = ["경력", "신입", "년", "무관"]
+
+def classify_info(info_text):
+    location, experience = "", ""
+    if info_text:
+        # 가운데 점(·)이 있으면 나누고, 없으면 통째로 리스트화
+        parts = [p.strip() for p in info_text.split("·")] if "·" in info_text else [info_text]
+        
+        for part in parts:
+            # 조각 내에 경력 관련 키워드가 있는지 검사
+            if any(key in part for key in EXP_KEYWORDS):
+                experience = part
+            else:
+                # 키워드가 없으면 지역으로 간주 (단, 이미 채워졌다면 무시)
+                if not location:
+                    location = part
+    return location, experience
 
 # ==========================================
 # [전용] 오퍼센트 사이트 데이터 수집 로직 (키워드 기반 분류 적용)
 # ==========================================
-def scrape_projects():
-    driver = get_driver()
-    new_data = []
+def scrape_projects(driver=None):
+    # 러너가 넘겨준 브라우저(탭)가 있으면 재사용하고, 없으면 직접 띄웁니다.
+    own_driver = driver is None
+    if own_driver: driver = get_driver()
+    collector = ResultCollector(canonical_url)
     today = datetime.now().strftime("%Y-%m-%d")
-    urls_check = set()
+    index = get_index(CONFIG["gid"])
+    seen_run = 0
     
     try:
         print(f"🔗 접속 중: {CONFIG['url']}")
-        driver.get(CONFIG["url"])
-        wait = WebDriverWait(driver, 20)
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "a.xqzk367")))
+        with span("page_load"):
+            driver.get(capture.listing_url(CONFIG["url"]))
+            wait = WebDriverWait(driver, 20)
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "a.xqzk367")))
         
         print("📥 실시간 누적 수집 및 데이터 분류를 시작합니다...")
         
-        # 단계별로 스크롤하며 수집 (필요시 range 숫자를 높여 더 많이 수집 가능)
-        for i in range(1, 21):
-            current_cards = driver.find_elements(By.CSS_SELECTOR, "a.xqzk367[href*='/jd/']")
-            
-            for card in current_cards:
-                try:
-                    full_href = card.get_attribute("href")
-                    clean_url = full_href.split('?')[0]
-                    title = card.text.strip()
-                    
-                    if clean_url not in urls_check and title:
-                        container = card.find_element(By.XPATH, "..")
-                        company_name, location, experience = "회사명 미상", "", ""
-                        
-                        for _ in range(5):
-                            try:
-                                # 회사명 추출
-                                company_el = container.find_element(By.CSS_SELECTOR, 'span[data-variant="body-02"]')
-                                company_name = company_el.text.strip()
-                                
-                                # 지역/경력 통합 텍스트 추출
-                                info_el = container.find_element(By.CSS_SELECTOR, 'span[data-variant="body-03"]')
-                                info_text = info_el.text.strip()
-                                
-                                # ------------------------------------------------------
-                                # [핵심] 키워드 기반 자동 분류 로직
-                                # ------------------------------------------------------
-                                if info_text:
-                                    # 가운데 점(·)이 있으면 나누고, 없으면 통째로 리스트화
-                                    parts = [p.strip() for p in info_text.split("·")] if "·" in info_text else [info_text]
-                                    
-                                    exp_keywords = ["경력", "신입", "년", "무관"]
-                                    
-                                    for part in parts:
-                                        # 조각 내에 경력 관련 키워드가 있는지 검사
-                                        if any(key in part for key in exp_keywords):
-                                            experience = part
-                                        else:
-                                            # 키워드가 없으면 지역으로 간주 (단, 이미 채워졌다면 무시)
-                                            if not location:
-                                                location = part
-
-                                if company_name != "회사명 미상": break
-                            except:
-                                container = container.find_element(By.XPATH, "..")
-
-                        new_data.append({
-                            'company': company_name, 'title': title, 'location': location,
-                            'experience': experience, 'url': clean_url, 'scraped_at': today
-                        })
-                        urls_check.add(clean_url)
-                        print(f"✨ 수집: {company_name} | {location} | {experience}")
-
-                except: continue
-            
-            driver.execute_script("window.scrollBy(0, 1200);")
-            time.sleep(2.5)
+        # 화면에 있는 카드를 누적 수집 (스크롤할 때마다 호출, 브라우저 왕복 1회)
+        def collect_visible_cards():
+            nonlocal seen_run
+            for card in driver.execute_script(EXTRACT_CARDS_JS, "a.xqzk367[href*='/jd/']"):
+                # 이미 시트에 저장한 공고는 건너뛰고, 연속으로 몇 건째인지 셉니다.
+                if card['href'] in index or card['href'] in collector:
+                    seen_run += 1
+                    continue
+                seen_run = 0
+                location, experience = classify_info(card['info'])
+                company_name = card['company'] or "회사명 미상"
+                collector.add({
+                    'company': company_name, 'title': card['title'], 'location': location,
+                    'experience': experience, 'url': card['href'], 'scraped_at': today
+                })
+                print(f"✨ 수집: {company_name} | {location} | {experience}")
+            # 최신순 목록이므로 저장된 공고가 연속으로 나오면 그 아래도 모두 저장된 공고입니다.
+            if seen_run >= CONFIG["stop_after_seen"]:
+                print(f"⏹️ 이미 저장한 공고가 {seen_run}건 연속으로 나와 스크롤을 멈춥니다.")
+                return True
+            return False
+        
+        # 단계별로 스크롤하며 수집 (필요시 max_scrolls를 높여 더 많이 수집 가능)
+        # 페이지 끝에서 새 카드가 두 번 연속 붙지 않으면 20회 전에 멈춥니다.
+        scroll_and_wait(driver, "a.xqzk367[href*='/jd/']", max_scrolls=20, patience=2,
+                        step_timeout=2.5, scroll_js="window.scrollBy(0, 1200);",
+                        on_step=collect_visible_cards)
+        capture.save_listing(driver, CONFIG["url"])
 
     finally: 
-        driver.quit()
+        if own_driver: driver.quit()
     
-    print(f"✅ 총 {len(new_data)}건의 공고를 정확하게 분류하여 수집했습니다!")
-    return new_data
+    print(f"✅ 총 {len(collector)}건의 공고를 정확하게 분류하여 수집했습니다!")
+    return collector.items()
     
 # ==========================================
 # [공통] 시트 데이터 업데이트 로직
@@ -136,30 +149,21 @@ def update_sheet(ws, data):
         print(f"[{CONFIG['name']}] 새로 수집된 공고가 없습니다.")
         return
 
-    all_v = ws.get_all_values()
-    headers = all_v[0] if all_v else ['company', 'title', 'location', 'experience', 'url', 'scraped_at', 'status']
-    
-    col_map = {name: i for i, name in enumerate(headers)}
-    # 기존 데이터 중복 비교 (URL 파라미터 제외)
-    existing_urls = {row[col_map['url']].split('?')[0] for row in all_v[1:] if len(row) > col_map['url']}
-    
-    rows_to_append = []
-    for item in data:
-        if item['url'] in existing_urls: continue
-        row = [''] * len(headers)
-        for k, v in item.items():
-            if k in col_map: row[col_map[k]] = v
-        if 'status' in col_map: row[col_map['status']] = 'archived'
-        rows_to_append.append(row)
-    
-    if rows_to_append:
-        ws.append_rows(rows_to_append)
-        print(f"💾 {CONFIG['name']} 신규 공고 {len(rows_to_append)}건 저장 완료")
+    # 중복 판정은 로컬 URL 인덱스로 하고 (첫 실행 시 시트 URL은 파라미터를 제외하고 등록),
+    # 시트에는 새 행만 추가합니다.
+    count = append_new_rows(
+        ws, data, CONFIG["gid"],
+        ['company', 'title', 'location', 'experience', 'url', 'scraped_at', 'status'],
+        normalize=canonical_url,
+    )
+    if count:
+        print(f"💾 {CONFIG['name']} 신규 공고 {count}건 저장 완료")
 
 # ==========================================
 # [공통] 실행 메인 루틴
 # ==========================================
 if __name__ == "__main__":
+    run_report.start()
     try:
         ws = get_worksheet()
         data = scrape_projects()
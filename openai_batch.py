@@ -0,0 +1,172 @@
+import os
+import io
+import json
+import time
+from sheet_utils import CACHE_DIR
+from async_engine import run_pipeline
+from llm_utils import LLMCache, request_body
+
+# =========================================================
+# [공통] OpenAI Batch API 모드
+# 매일 밤 도는 sender는 즉시 응답이 필요 없으므로, 행마다 동기 호출하는 대신
+# 필요한 요청을 JSONL 파일 하나로 모아 배치 작업으로 제출하고 결과를 LLM 캐시에 채웁니다.
+# 이후 파이프라인은 평소처럼 돌지만 llm_cache.chat_json이 모두 캐시에서 바로 반환됩니다.
+# - 제출한 batch id는 .cache/batches/<이름>.json에 저장해, 작업이 끊겨도 다음 실행에서 이어서 기다립니다.
+# - 결과가 MAX_WAIT 안에 나오지 않으면 행은 'archived'로 남고 다음 실행에서 다시 확인합니다.
+# - 판단·요약을 따로 부르는 분리 모드(LLM_MODE=split)는 판단 배치가 끝난 뒤
+#   적합으로 나온 행의 요약만 두 번째 배치로 보냅니다 (prefill_split).
+# =========================================================
+BATCH_DIR = os.path.join(CACHE_DIR, "batches")
+POLL_INTERVAL = float(os.environ.get("BATCH_POLL_INTERVAL", 30))
+MAX_WAIT = float(os.environ.get("BATCH_MAX_WAIT", 50 * 60))
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchRunner:
+    def __init__(self, client, cache, name, poll_interval=POLL_INTERVAL, max_wait=MAX_WAIT):
+        self.client = client
+        self.cache = cache
+        self.name = name
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self.state_path = os.path.join(BATCH_DIR, f"{name}.json")
+
+    # ---------- 진행 중인 배치 기록 ----------
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_state(self, state):
+        os.makedirs(BATCH_DIR, exist_ok=True)
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+
+    def _clear_state(self):
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    # ---------- 제출 · 대기 · 결과 반영 ----------
+    @staticmethod
+    def _key(call):
+        return LLMCache.make_key(call["model"], call["name"], call["version"], call["system"],
+                                 call["prompt"], call["text"], call["schema"])
+
+    def result(self, call):
+        # 요청의 캐시된 결과 (아직 없으면 None)
+        return self.cache.get(self._key(call))
+
+    def _submit(self, calls):
+        lines, names = [], {}
+        for call in calls:
+            key = self._key(call)
+            if key in names:
+                continue
+            names[key] = call["name"]
+            lines.append(json.dumps({
+                "custom_id": key,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": request_body(call["model"], call["system"], call["prompt"], call["schema"]),
+            }, ensure_ascii=False))
+
+        payload = io.BytesIO(("\n".join(lines) + "\n").encode("utf-8"))
+        payload.name = f"{self.name}_batch.jsonl"
+        input_file = self.client.files.create(file=payload, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        state = {"batch_id": batch.id, "names": names, "submitted_at": time.time()}
+        self._save_state(state)
+        print(f"📤 [{self.name}] 배치 제출: {len(lines)}건 (batch id: {batch.id})")
+        return state
+
+    def _wait(self, batch_id):
+        started = time.monotonic()
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in FINAL_STATUSES:
+                return batch
+            if time.monotonic() - started >= self.max_wait:
+                print(f"⏳ [{self.name}] 배치가 아직 {batch.status} 상태입니다. 다음 실행에서 이어서 확인합니다.")
+                return None
+            time.sleep(self.poll_interval)
+
+    def _collect(self, batch, names):
+        stored = failed = 0
+        if batch.output_file_id:
+            for line in self.client.files.content(batch.output_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                try:
+                    if response.get("status_code") != 200:
+                        raise ValueError(response.get("status_code"))
+                    content = response["body"]["choices"][0]["message"]["content"]
+                    self.cache.put(record["custom_id"], names.get(record["custom_id"], ""), json.loads(content))
+                    stored += 1
+                except (KeyError, IndexError, TypeError, ValueError):
+                    failed += 1
+        if batch.error_file_id:
+            failed += sum(1 for line in self.client.files.content(batch.error_file_id).text.splitlines() if line.strip())
+        print(f"📥 [{self.name}] 배치 {batch.status}: 결과 {stored}건 저장, 실패 {failed}건")
+        return stored
+
+    def _finish(self, state):
+        batch = self._wait(state["batch_id"])
+        if batch is None:
+            return False
+        self._collect(batch, state["names"])
+        self._clear_state()
+        return True
+
+    def prefill(self, calls):
+        """
+        calls(llm_utils.llm_call 목록) 중 캐시에 없는 것만 배치로 처리해 LLM 캐시를 채웁니다.
+        반환값: 모든 배치가 끝났으면 True, 아직 진행 중이면 False (다음 실행에서 이어감)
+        배치에서 실패한 요청은 캐시에 남지 않으므로, 파이프라인에서 평소처럼 동기 호출됩니다.
+        """
+        # 1) 이전 실행에서 제출한 배치가 있으면 먼저 이어서 기다립니다.
+        state = self._load_state()
+        if state:
+            print(f"🔁 [{self.name}] 이전 배치 이어서 확인: {state['batch_id']}")
+            if not self._finish(state):
+                return False
+
+        # 2) 남은 요청(캐시에 없는 것)만 새 배치로 제출합니다.
+        pending = [call for call in calls if self.result(call) is None]
+        if not pending:
+            print(f"✅ [{self.name}] 배치로 보낼 요청이 없습니다 (모두 캐시됨).")
+            return True
+        return self._finish(self._submit(pending))
+
+    def prefill_split(self, pairs):
+        """
+        분리 모드용: pairs는 행마다 (판단 요청, 요약 요청) 쌍입니다.
+        판단 배치가 모두 끝나면 is_appropriate가 참으로 나온 행의 요약만 두 번째 배치로 보냅니다.
+        어느 배치든 진행 중이면 False를 반환하고, 다음 실행의 prefill이 저장된 batch id부터 이어갑니다.
+        """
+        if not self.prefill([judge for judge, _ in pairs]):
+            return False
+        return self.prefill([summary for judge, summary in pairs if (self.result(judge) or {}).get("is_appropriate")])
+
+
+def prefetch_texts(items, fetch_stage, workers):
+    # 배치에 넣을 본문을 먼저 모두 수집합니다 (상세 페이지는 HTTP 캐시에 남아 본 실행에서 재사용).
+    fetched = []
+
+    def stage(item):
+        result = fetch_stage(dict(item))
+        # 다른 소스와 중복으로 판정된 행은 LLM 요청이 필요 없으므로 배치에서 뺍니다.
+        if result is not None and 'text' in result and not result.get('duplicate_of'):
+            fetched.append(result)
+
+    run_pipeline(items, [("fetch", stage, workers)],
+                 on_error=lambda item, stage_name, e: print(f"❌ {item['row']}행 본문 수집 오류: {e}"))
+    return fetched
+
@@ -0,0 +1,197 @@
+import re
+import time
+import asyncio
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from run_report import record
+
+# =========================================================
+# [공통] 서비스별 요청 한도 관리 (OpenAI / Slack / Sheets)
+# 서비스마다 토큰 버킷 하나를 모든 워커가 공유하고, 429·5xx 응답을 받으면
+# Retry-After(또는 x-ratelimit-reset-*) 헤더만큼만 버킷 전체를 멈춘 뒤 다시 시도합니다.
+# 헤더가 없으면 지터를 넣은 지수 백오프를 사용합니다.
+# 서비스별로 기다린 시간·재시도 횟수를 세어 실행 끝에 출력합니다.
+# =========================================================
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# 초당 요청 수(rate)와 한 번에 몰아서 보낼 수 있는 양(burst)
+LIMITS = {
+    "openai": {"rate": 5.0, "burst": 10},
+    "slack": {"rate": 1.0, "burst": 1},     # Incoming Webhook: 초당 1건
+    "sheets": {"rate": 1.0, "burst": 5},    # 쓰기 요청: 분당 60건
+}
+
+_lock = threading.Lock()
+_limiters = {}
+
+
+def _parse_duration(value):
+    # OpenAI 리셋 헤더 형식: "20ms", "1s", "6m0s", "1h2m3.5s"
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    return sum(float(num) * units[unit] for num, unit in parts)
+
+
+def retry_after(headers):
+    value = headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        if headers.get(name):
+            seconds = _parse_duration(headers[name])
+            if seconds is not None:
+                return seconds
+    return None
+
+
+def _status_and_headers(obj):
+    # 예외(openai.RateLimitError, gspread APIError 등)나 응답 객체(requests.Response)에서 상태 코드와 헤더를 꺼냅니다.
+    if obj is None:
+        return None, {}
+    response = getattr(obj, "response", None) if isinstance(obj, BaseException) else obj
+    status = getattr(obj, "status_code", None) or getattr(response, "status_code", None)
+    headers = getattr(response, "headers", None) or {}
+    return status, headers
+
+
+class RateLimiter:
+    def __init__(self, name, rate, burst=1, max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self.calls = self.retries = 0
+        self.throttled = 0.0
+
+    def _reserve(self):
+        # 토큰을 하나 가져오면 0을, 아니면 토큰이 생기거나 차단이 풀릴 때까지 기다릴 시간(초)을 반환합니다.
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = self._blocked_until - now
+            if wait <= 0:
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.calls += 1
+                    return 0
+                wait = (1 - self._tokens) / self.rate
+            self.throttled += wait
+            return wait
+
+    def acquire(self):
+        # 필요한 만큼만 기다립니다.
+        waited = 0.0
+        while True:
+            wait = self._reserve()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+            waited += wait
+        if waited:
+            record(f"ratelimit.{self.name}", waited)
+
+    async def acquire_async(self):
+        # acquire와 같지만 이벤트 루프를 막지 않고 기다립니다 (async_engine).
+        waited = 0.0
+        while True:
+            wait = self._reserve()
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+            waited += wait
+        if waited:
+            record(f"ratelimit.{self.name}", waited)
+
+    def block_for(self, seconds):
+        # 한 워커가 한도 초과 응답을 받으면 같은 서비스를 쓰는 모든 워커가 함께 멈춥니다.
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def _respect_headers(self, headers):
+        if headers.get("x-ratelimit-remaining-requests") == "0":
+            seconds = retry_after(headers)
+            if seconds:
+                self.block_for(seconds)
+
+    def _retry_delay(self, result, error, attempt):
+        # 다시 시도해야 하면 기다릴 시간(초)을, 아니면 None을 반환합니다.
+        status, headers = _status_and_headers(error if error is not None else result)
+        if status not in RETRY_STATUSES or attempt == self.max_retries:
+            if error is None:
+                self._respect_headers(headers)
+            return None
+
+        delay = retry_after(headers)
+        if delay is None:
+            delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+        with self._lock:
+            self.retries += 1
+        print(f"⏳ [{self.name}] {status} 응답: {delay:.1f}초 후 다시 시도합니다 ({attempt + 1}/{self.max_retries})")
+        return delay
+
+    def call(self, func, *args, **kwargs):
+        """
+        func(*args, **kwargs)를 한도 안에서 호출합니다.
+        429·5xx(예외 또는 status_code가 있는 응답)면 재시도하고, 마지막 시도의 결과(또는 예외)를 그대로 돌려줍니다.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            try:
+                result, error = func(*args, **kwargs), None
+            except Exception as e:
+                result, error = None, e
+
+            delay = self._retry_delay(result, error, attempt)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return result
+            self.block_for(delay)
+
+    async def acall(self, func, *args, **kwargs):
+        # call의 비동기 버전: func는 코루틴 함수이며, 같은 버킷·통계를 동기 호출과 공유합니다.
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async()
+            try:
+                result, error = await func(*args, **kwargs), None
+            except Exception as e:
+                result, error = None, e
+
+            delay = self._retry_delay(result, error, attempt)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return result
+            self.block_for(delay)
+
+    def stats(self):
+        return f"🚦 {self.name}: 요청 {self.calls}건 / 재시도 {self.retries}건 / 대기 {self.throttled:.1f}초"
+
+
+def get_limiter(name):
+    # 같은 프로세스의 모든 워커가 서비스별 한도 하나를 공유합니다.
+    with _lock:
+        if name not in _limiters:
+            _limiters[name] = RateLimiter(name, **LIMITS.get(name, {"rate": 1.0}))
+        return _limiters[name]
+
+
+def limiter_stats():
+    with _lock:
+        return "\n".join(limiter.stats() for limiter in _limiters.values())
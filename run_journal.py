@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import threading
+from sheet_utils import CACHE_DIR
+
+# =========================================================
+# [공통] Sender 실행 기록 (append-only 저널)
+# sender가 중간에 죽으면(러너 시간 초과, 시트 오류 등) 슬랙에는 이미 보냈는데
+# 시트의 status가 'published'로 바뀌지 않아 다음 실행에서 같은 글을 다시 보내게 됩니다.
+# 행마다(URL 기준) 단계를 마칠 때마다 한 줄씩 기록해 두고, 다음 실행에서는
+# - 판단·요약 결과가 있으면 그 결과로 바로 전송 단계부터 이어서 처리하고
+# - 슬랙 전송(posted)까지 끝난 행은 다시 보내지 않고 시트만 갱신합니다.
+# 시트 기록이 끝난(written) 행은 다음 실행 시작 때 저널에서 정리합니다.
+# =========================================================
+JOURNAL_DIR = os.path.join(CACHE_DIR, "journal")
+JOURNAL_TTL = 7 * 24 * 60 * 60       # 전송 전 단계 기록은 일주일이 지나면 버림
+POSTED_TTL = 30 * 24 * 60 * 60       # 전송 기록은 시트에 반영되거나 (행이 더 이상 대상이 아니면) 한 달 뒤에 버림
+STAGES = ("fetched", "classified", "summarized", "posted", "written")
+# 단계 결과 중 저널에 남겨 다음 실행에서 되살릴 항목 (본문 text는 HTTP 캐시에 있으므로 제외)
+RESULT_FIELDS = ("is_appropriate", "drop_reason", "gpt_res", "fingerprint", "duplicate_of")
+
+
+class RunJournal:
+    def __init__(self, name, path=None):
+        self.name = name
+        self.path = path or os.path.join(JOURNAL_DIR, f"{name}.jsonl")
+        self._lock = threading.Lock()
+        self._state = {}    # url -> {"stages": set, "data": dict, "at": 마지막 기록 시각}
+        self._rows = {}     # 이번 실행의 시트 행 번호 -> url
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._load()
+        self._compact()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    # ---------- 불러오기 · 정리 ----------
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue    # 기록 도중 끊긴 마지막 줄
+            state = self._state.setdefault(entry["key"], {"stages": set(), "data": {}, "at": 0})
+            state["stages"].add(entry["stage"])
+            state["data"].update(entry.get("data") or {})
+            state["at"] = entry.get("at", 0)
+
+    def _compact(self):
+        # 시트 기록까지 끝난 행과 오래된 미전송 기록을 지우고, 남은 상태만 새 파일로 다시 씁니다.
+        now = time.time()
+        self._state = {
+            key: state for key, state in self._state.items()
+            if "written" not in state["stages"]
+            and now - state["at"] < (POSTED_TTL if "posted" in state["stages"] else JOURNAL_TTL)
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for key, state in self._state.items():
+                # 단계마다 한 줄씩, 되살릴 결과는 마지막 줄에 한 번만 씁니다.
+                stages = [stage for stage in STAGES if stage in state["stages"]]
+                for i, stage in enumerate(stages):
+                    f.write(self._line(key, stage, state["at"], state["data"] if i == len(stages) - 1 else {}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _line(key, stage, at, data):
+        return json.dumps({"key": key, "stage": stage, "at": at, "data": data}, ensure_ascii=False) + "\n"
+
+    # ---------- 기록 ----------
+    def record(self, item, stage, **data):
+        # 한 줄을 추가하고 디스크에 확실히 쓴 뒤 반환합니다 (바로 다음에 프로세스가 죽어도 남도록).
+        key = item['url']
+        now = time.time()
+        with self._lock:
+            self._file.write(self._line(key, stage, now, data))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            state = self._state.setdefault(key, {"stages": set(), "data": {}, "at": now})
+            state["stages"].add(stage)
+            state["data"].update(data)
+            state["at"] = now
+
+    def done(self, item, stage):
+        with self._lock:
+            state = self._state.get(item['url'])
+            return state is not None and stage in state["stages"]
+
+    def mark_written(self, rows):
+        # SheetWriteBuffer(on_flush=...)에서 호출: status 셀이 실제로 시트에 기록된 행만 written으로 남깁니다.
+        for row in rows:
+            key = self._rows.get(row)
+            if key is not None:
+                self.record({'url': key}, "written")
+
+    # ---------- 이어서 처리 ----------
+    def resume(self, items):
+        # 이전 실행의 단계 결과를 행에 되살립니다 (행 번호가 바뀌어도 URL로 찾음).
+        resumed = posted = 0
+        for item in items:
+            self._rows[item['row']] = item['url']
+            state = self._state.get(item['url'])
+            if state is None:
+                continue
+            item.update({k: v for k, v in state["data"].items() if k in RESULT_FIELDS})
+            resumed += 1
+            posted += "posted" in state["stages"]
+        if resumed:
+            print(f"↩️ [{self.name}] 이전 실행 기록으로 {resumed}건 이어서 처리 (슬랙 전송 완료 {posted}건)")
+        return items
+
+    @staticmethod
+    def _ready(item):
+        # 판단(부적합)이나 요약까지 끝난 행은 바로 전송 단계로 넘깁니다.
+        return item.get('is_appropriate') is False or 'gpt_res' in item
+
+    def stage(self, name, func):
+        """
+        단계 함수를 감싸, 끝난 결과를 name 단계로 기록합니다.
+        이미 전송 단계로 넘길 수 있는 행(이전 실행 결과를 되살린 행)은 함수를 호출하지 않습니다.
+        """
+        def run(item):
+            if self._ready(item):
+                return item
+            result = func(item)
+            if result is not None:
+                self.record(result, name, **{f: result[f] for f in RESULT_FIELDS if f in result})
+            return result
+        return run
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import math
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# =========================================================
+# [공통] 구간별 시간 측정과 실행 리포트
+# 이모지 로그만으로는 실행 시간이 어디에(대기, 페이지 요청, OpenAI, 시트 기록 …) 쓰였는지 알 수 없어서,
+# 주요 구간을 span(이름)으로 감싸 소요 시간을 모으고, 종료 시 구간별
+# 횟수·합계·p50/p95를 JSON 리포트(reports/<실행 이름>.json)로 남깁니다.
+# 측정은 언제나 하고, 리포트 파일은 start()를 호출한 실행(각 스크립트의 메인)에서만 씁니다.
+# =========================================================
+REPORT_DIR = os.environ.get("RUN_REPORT_DIR", "reports")
+
+_lock = threading.Lock()
+_durations = {}     # 구간 이름 -> [소요 시간(초), ...]
+_errors = {}        # 구간 이름 -> 예외로 끝난 횟수
+_run = {}
+
+
+def record(name, seconds, error=False):
+    with _lock:
+        _durations.setdefault(name, []).append(seconds)
+        if error:
+            _errors[name] = _errors.get(name, 0) + 1
+
+
+@contextmanager
+def span(name):
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        record(name, time.perf_counter() - started, error)
+
+
+def _percentile(sorted_values, p):
+    # nearest-rank 방식
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summary():
+    with _lock:
+        snapshot = {name: sorted(values) for name, values in _durations.items()}
+        errors = dict(_errors)
+    return {
+        name: {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "total_s": round(sum(values), 3),
+            "p50_s": round(_percentile(values, 50), 3),
+            "p95_s": round(_percentile(values, 95), 3),
+            "max_s": round(values[-1], 3),
+        }
+        for name, values in sorted(snapshot.items())
+    }
+
+
+def write_report(path=None):
+    stages = summary()
+    report = {
+        "run": _run.get("name"),
+        "started_at": _run.get("started_at"),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "wall_s": round(time.perf_counter() - _run.get("perf_start", time.perf_counter()), 3),
+        "stages": stages,
+    }
+    path = path or os.path.join(REPORT_DIR, f"{_run.get('name') or 'run'}.json")
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        print(f"⚠️ 실행 리포트 저장 실패: {e}")
+        return None
+
+    # 합계가 큰 구간부터 몇 줄만 콘솔에도 보여 줍니다.
+    top = sorted(stages.items(), key=lambda kv: kv[1]["total_s"], reverse=True)[:8]
+    print(f"\n📊 실행 리포트 저장: {path} (전체 {report['wall_s']:.1f}초)")
+    for name, s in top:
+        print(f"   {name}: {s['count']}회 / 합계 {s['total_s']:.1f}초 / p50 {s['p50_s']:.2f}초 / p95 {s['p95_s']:.2f}초")
+    return path
+
+
+def start(name=None):
+    # 실행 이름(기본: 스크립트 파일 이름)을 정하고, 종료 시(sys.exit 포함) 리포트를 쓰도록 등록합니다.
+    if _run:
+        return
+    _run.update({
+        "name": name or os.path.splitext(os.path.basename(sys.argv[0]))[0] or "run",
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "perf_start": time.perf_counter(),
+    })
+    atexit.register(write_report)
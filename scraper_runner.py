@@ -0,0 +1,92 @@
+import sys
+import time
+import queue
+import argparse
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from scraper_utils import get_driver
+import run_report
+from run_report import span
+
+# =========================================================
+# [통합] 멀티 사이트 스크래퍼 러너
+# 각 사이트 모듈(<이름>_scraper.py)의 CONFIG / scrape_projects / update_sheet를
+# 플러그인처럼 불러와, 하나의 브라우저(또는 작은 브라우저 풀)를 공유하며
+# 사이트마다 새 탭에서 수집하고 각자의 gid 탭에 저장합니다.
+# =========================================================
+
+SITES = ["side", "letspl", "offercent", "surfit", "mix"]
+
+
+def load_site(name):
+    module = importlib.import_module(f"{name}_scraper")
+    for attr in ("CONFIG", "scrape_projects", "get_worksheet", "update_sheet"):
+        if not hasattr(module, attr):
+            raise Exception(f"{name}_scraper에 {attr}가 없습니다.")
+    return module
+
+
+def run_site(module, driver):
+    # 사이트마다 새 탭을 열어 쿠키·스크롤 상태가 섞이지 않게 합니다.
+    home = driver.current_window_handle
+    driver.switch_to.new_window('tab')
+    try:
+        data = module.scrape_projects(driver)
+    finally:
+        driver.close()
+        driver.switch_to.window(home)
+    ws = module.get_worksheet()
+    module.update_sheet(ws, data)
+    return len(data)
+
+
+def run_all(names, pool_size=1):
+    modules = [load_site(name) for name in names]
+    pool_size = max(1, min(pool_size, len(modules)))
+
+    started = time.perf_counter()
+    drivers = queue.Queue()
+    for _ in range(pool_size):
+        drivers.put(get_driver())
+    print(f"🚀 브라우저 {pool_size}개 준비 완료 ({time.perf_counter() - started:.1f}초)")
+
+    def task(module):
+        driver = drivers.get()
+        site_started = time.perf_counter()
+        try:
+            with span(f"site.{module.__name__[:-len('_scraper')]}"):
+                count = run_site(module, driver)
+            return module.CONFIG["name"], count, time.perf_counter() - site_started, None
+        except Exception as e:
+            return module.CONFIG["name"], 0, time.perf_counter() - site_started, e
+        finally:
+            drivers.put(driver)
+
+    try:
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            results = list(executor.map(task, modules))
+    finally:
+        while not drivers.empty():
+            drivers.get().quit()
+
+    print("\n--- 사이트별 소요 시간 ---")
+    failed = False
+    for name, count, elapsed, error in results:
+        if error:
+            failed = True
+            print(f"❌ {name}: {elapsed:.1f}초 (실패: {error})")
+        else:
+            print(f"✅ {name}: {elapsed:.1f}초 ({count}건 수집)")
+    print(f"⏱️ 전체 {time.perf_counter() - started:.1f}초")
+    return not failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="여러 사이트를 하나의 브라우저로 수집합니다.")
+    parser.add_argument("sites", nargs="*", default=SITES, help=f"수집할 사이트 (기본: {' '.join(SITES)})")
+    parser.add_argument("--pool", type=int, default=1, help="동시에 띄울 브라우저 수")
+    args = parser.parse_args()
+    run_report.start()
+
+    if not run_all(args.sites, args.pool):
+        sys.exit(1)
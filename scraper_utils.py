@@ -0,0 +1,306 @@
+import os
+import json
+import time
+import requests
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from sheet_utils import CACHE_DIR, read_columns
+from seen_index import get_index
+from rate_limiter import get_limiter
+from run_report import span
+import capture
+
+# =========================================================
+# [공통] 스크래퍼 공용 도구
+# =========================================================
+
+FETCH_MODE_PATH = os.path.join(CACHE_DIR, "fetch_modes.json")
+# 브라우저 모드로 굳어진 사이트도 이 기간이 지나면 정적 수집을 다시 시도합니다.
+STATIC_RETRY_AFTER = 7 * 24 * 60 * 60
+
+HEADERS_UA = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7',
+}
+
+# [공통] 브라우저 실행 (모든 사이트에서 함께 쓸 수 있도록 가장 넓은 위장 설정 사용)
+def get_driver():
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    # 창 크기 지정 (요소가 숨겨지는 것 방지)
+    options.add_argument("--window-size=1920,1080")
+
+    user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    options.add_argument(f"user-agent={user_agent}")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+
+    with span("driver_start"):
+        driver = webdriver.Chrome(options=options)
+
+    # 브라우저 지문 변조 (새 탭에도 적용됨)
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+        "source": """
+            Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+            window.chrome = { runtime: {} };
+            Object.defineProperty(navigator, 'languages', {get: () => ['ko-KR', 'ko', 'en-US', 'en']});
+        """
+    })
+    return driver
+
+
+# =========================================================
+# [공통] 수집 방식 선택 (정적 HTTP 우선, 필요할 때만 브라우저)
+# =========================================================
+def fetch_html(url, timeout=10):
+    with span("http_get"):
+        resp = requests.get(capture.page_url(url), headers=HEADERS_UA, timeout=timeout)
+    resp.raise_for_status()
+    capture.save_response(url, resp)
+    return resp.text
+
+
+def _load_fetch_modes():
+    try:
+        with open(FETCH_MODE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_fetch_mode(gid, mode):
+    modes = _load_fetch_modes()
+    modes[gid] = {"mode": mode, "at": time.time()}
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(FETCH_MODE_PATH, "w", encoding="utf-8") as f:
+            json.dump(modes, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        print(f"⚠️ 수집 방식 기록 실패: {e}")
+
+
+def scrape_with_strategy(config, scrape_static, scrape_browser, driver=None):
+    """
+    config["fetch"]가 "static"/"browser"이면 그 방식만 쓰고, "auto"(기본)이면
+    지난번에 성공한 방식을 먼저 시도합니다. 정적 수집이 실패하거나 0건이면 브라우저로 넘어갑니다.
+    """
+    setting = config.get("fetch", "auto")
+    if capture.REPLAY:
+        # 기록할 때 성공한 방식(정적 응답 또는 목록 DOM)을 그대로 재생하고, 수집 방식 기록은 건드리지 않습니다.
+        if scrape_static is not None and setting != "browser" and capture.has("page", config["url"]):
+            return scrape_static()
+        return scrape_browser(driver)
+    if setting == "browser" or scrape_static is None:
+        return scrape_browser(driver)
+    if setting == "static":
+        return scrape_static()
+
+    last = _load_fetch_modes().get(config["gid"], {})
+    if last.get("mode") == "browser" and time.time() - last.get("at", 0) < STATIC_RETRY_AFTER:
+        return scrape_browser(driver)
+
+    try:
+        with span("scrape_static"):
+            data = scrape_static()
+    except Exception as e:
+        print(f"⚠️ [{config['name']}] 정적 수집 실패: {e}")
+        data = []
+
+    if data:
+        print(f"⚡ [{config['name']}] 브라우저 없이 {len(data)}건 수집")
+        _save_fetch_mode(config["gid"], "static")
+        return data
+
+    print(f"🌐 [{config['name']}] 정적 수집 결과가 없어 브라우저로 전환합니다.")
+    data = scrape_browser(driver)
+    if data:
+        _save_fetch_mode(config["gid"], "browser")
+    return data
+
+
+# =========================================================
+# [공통] 조건 기반 대기 (고정 sleep 대신 카드가 실제로 늘어났는지 확인)
+# =========================================================
+_CARD_SIGNATURE_JS = """
+const els = document.querySelectorAll(arguments[0]);
+const last = els.length ? els[els.length - 1] : null;
+return [els.length, last ? (last.href || last.textContent || '').slice(0, 200) : ''];
+"""
+
+_AT_BOTTOM_JS = "return window.innerHeight + window.scrollY >= document.body.scrollHeight - 2;"
+
+
+def card_signature(driver, selector):
+    # 카드 수와 마지막 카드의 링크를 함께 봐서, 가상 스크롤로 DOM이 교체되는 목록도 변화를 감지합니다.
+    count, last = driver.execute_script(_CARD_SIGNATURE_JS, selector)
+    return count, last
+
+
+def wait_for_change(driver, selector, previous, timeout=5.0, poll=0.25, sentinel=None):
+    """카드 목록이 previous와 달라지거나 sentinel("더 이상 없음" 표시)이 보이면 즉시 반환합니다."""
+    end = time.monotonic() + timeout
+    while True:
+        current = card_signature(driver, selector)
+        if current != previous:
+            return current, True
+        if sentinel and driver.execute_script("return !!document.querySelector(arguments[0]);", sentinel):
+            return current, False
+        if time.monotonic() >= end:
+            return current, False
+        time.sleep(poll)
+
+
+def wait_for_cards(driver, selector, timeout=20.0, settle=1.0, poll=0.25):
+    """카드가 나타난 뒤 settle초 동안 개수가 변하지 않으면(첫 화면 로딩 완료) 반환합니다."""
+    end = time.monotonic() + timeout
+    last, stable_since = None, time.monotonic()
+    with span("wait_cards"):
+        while time.monotonic() < end:
+            current = card_signature(driver, selector)
+            if current != last:
+                last, stable_since = current, time.monotonic()
+            elif current[0] > 0 and time.monotonic() - stable_since >= settle:
+                break
+            time.sleep(poll)
+    return last[0] if last else 0
+
+
+def scroll_and_wait(driver, selector, max_scrolls=20, patience=2, step_timeout=5.0,
+                    deadline=60.0, scroll_js="window.scrollTo(0, document.body.scrollHeight);",
+                    sentinel=None, on_step=None):
+    """
+    스크롤할 때마다 새 카드가 붙을 때까지만 기다립니다.
+    - 페이지 끝에서 patience번 연속으로 새 카드가 없거나, sentinel이 보이거나, deadline이 지나면 멈춥니다.
+    - on_step이 있으면 스크롤 전에 매번 호출합니다 (화면에 보이는 카드 누적 수집용).
+      on_step이 True를 반환하면 (예: 이미 저장한 카드만 연속으로 나옴) 바로 멈춥니다.
+    반환값: 실제로 수행한 스크롤 횟수
+    """
+    started = time.monotonic()
+    signature = card_signature(driver, selector)
+    stale = 0
+    scrolls = 0
+
+    for _ in range(max_scrolls):
+        if on_step:
+            with span("extract"):
+                if on_step():
+                    return scrolls
+        if time.monotonic() - started >= deadline:
+            print(f"⏱️ 스크롤 제한 시간({deadline:.0f}초) 도달")
+            break
+
+        driver.execute_script(scroll_js)
+        scrolls += 1
+        at_bottom = driver.execute_script(_AT_BOTTOM_JS)
+        # 페이지 중간이면 렌더링만 잠깐 기다리고, 끝에 닿았을 때만 추가 로딩을 충분히 기다립니다.
+        with span("scroll"):
+            signature, changed = wait_for_change(
+                driver, selector, signature,
+                timeout=step_timeout if at_bottom else min(step_timeout, 0.5),
+                sentinel=sentinel,
+            )
+        if sentinel and driver.execute_script("return !!document.querySelector(arguments[0]);", sentinel):
+            break
+        if changed:
+            stale = 0
+        elif at_bottom:
+            stale += 1
+            if stale >= patience:
+                break
+
+    if on_step:
+        with span("extract"):
+            on_step()
+    return scrolls
+
+
+# =========================================================
+# [공통] 수집 결과 모음 (정규화한 URL 기준 순서 유지 집합)
+# 중복 확인이 O(1)이므로, 카드의 URL만 먼저 읽고 이미 모은 카드라면
+# 제목·지역 등 나머지 요소 작업 전에 바로 건너뛸 수 있습니다.
+# =========================================================
+class ResultCollector:
+    def __init__(self, canonicalize=None):
+        self.canonicalize = canonicalize or (lambda url: url)
+        self._items = {}
+
+    def __contains__(self, url):
+        return self.canonicalize(url) in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, item):
+        # item['url']을 정규화해 저장하며, 이미 있던 URL이면 False를 반환합니다.
+        url = self.canonicalize(item['url'])
+        if url in self._items:
+            return False
+        item['url'] = url
+        self._items[url] = item
+        return True
+
+    def items(self):
+        return list(self._items.values())
+
+# =========================================================
+# [공통] 신규 행 저장 (시트는 기록 대상으로만 사용)
+# 중복 판정은 로컬 URL 인덱스(seen_index)로 하되, 인덱스만 믿지 않고
+# 지난번에 확인한 행(synced_rows) 뒤에 붙은 url만 시트에서 읽어 인덱스에 더합니다.
+# 인덱스가 비어 있거나 시트 행이 줄어든 경우(행 삭제)에는 url 열 전체를 다시 읽습니다.
+# =========================================================
+def _sync_index(ws, index, normalize=None):
+    synced = index.synced_rows if not index.is_empty() else 0
+    if synced >= 2:
+        # 마지막으로 확인한 행도 함께 읽어, 그 행이 비어 있으면 시트가 줄어든 것으로 봅니다.
+        headers, url_rows = read_columns(ws, ['url'], optional=['url'], start_row=synced + 1, extra_rows=[synced])
+        if 'url' in headers and not any(row == synced and url for row, url in url_rows):
+            print("🗂️ 시트 행이 줄어 URL 인덱스를 처음부터 다시 맞춥니다.")
+            synced = 0
+    if synced < 2:
+        headers, url_rows = read_columns(ws, ['url'], optional=['url'])
+    if 'url' not in headers:
+        return headers
+
+    existing = [url for row, url in url_rows if url and row > synced]
+    if normalize: existing = [normalize(u) for u in existing]
+    added = index.add_many(existing)
+    if synced < 2:
+        print(f"🗂️ URL 인덱스 초기화: 시트에서 {added}건 등록")
+    elif added:
+        print(f"🗂️ URL 인덱스에 없던 시트 행 {added}건 반영 ({synced + 1}행 이후)")
+    # 이번에 붙일 행은 다음 실행에서 한 번 더 읽혀도(이미 인덱스에 있음) 문제없으므로 읽은 끝까지만 기록합니다.
+    index.set_synced_rows(max([synced] + [row for row, _ in url_rows]))
+    return headers
+
+
+def append_new_rows(ws, data, gid, default_headers, normalize=None):
+    index = get_index(gid)
+    # 필요한 url 셀만 읽어 인덱스를 시트와 맞춥니다 (헤더도 함께 받음).
+    headers = _sync_index(ws, index, normalize) or default_headers
+
+    col_map = {name: i for i, name in enumerate(headers)}
+    if 'url' not in col_map:
+        print("❌ 'url' 컬럼을 찾을 수 없습니다.")
+        return 0
+
+    rows, new_urls = [], set()
+    for item in data:
+        if item['url'] in index or item['url'] in new_urls: continue
+        row = [''] * len(headers)
+        for k, v in item.items():
+            if k in col_map: row[col_map[k]] = v
+        if 'status' in col_map: row[col_map['status']] = 'archived'
+        rows.append(row)
+        new_urls.add(item['url'])
+
+    if rows:
+        with span("sheet_append"):
+            get_limiter("sheets").call(ws.append_rows, rows)
+        # 시트 저장이 끝난 URL만 인덱스에 기록합니다.
+        index.add_many(new_urls)
+    return len(rows)
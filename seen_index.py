@@ -0,0 +1,77 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from sheet_utils import CACHE_DIR
+
+# =========================================================
+# [공통] 수집 URL 인덱스 (gid별)
+# 시트 전체를 다시 읽어 중복을 거르는 대신, 한 번 저장한 URL의 해시와
+# 처음 본 날짜를 로컬 SQLite에 남겨 두고 시작할 때 메모리로 불러옵니다.
+# 인덱스가 시트와 어긋나지 않도록(캐시 저장 실패, 다른 워크플로의 추가 등) 마지막으로 확인한
+# 시트 행 번호(synced_rows)도 남겨, 다음 실행에서는 그 뒤에 붙은 url만 읽어 맞춥니다.
+# =========================================================
+INDEX_PATH = os.path.join(CACHE_DIR, "seen_urls.sqlite3")
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+def url_hash(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+class SeenIndex:
+    def __init__(self, gid, path=INDEX_PATH):
+        self.gid = str(gid)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen ("
+                " gid TEXT NOT NULL, url_hash TEXT NOT NULL, first_seen TEXT NOT NULL,"
+                " PRIMARY KEY (gid, url_hash))"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS sync (gid TEXT PRIMARY KEY, rows INTEGER NOT NULL)")
+            self._conn.commit()
+            rows = self._conn.execute("SELECT url_hash FROM seen WHERE gid = ?", (self.gid,))
+            self._hashes = {h for (h,) in rows}
+            row = self._conn.execute("SELECT rows FROM sync WHERE gid = ?", (self.gid,)).fetchone()
+            self.synced_rows = row[0] if row else 0    # 0이면 시트와 맞춰 본 적 없음 (처음부터 읽음)
+
+    def __contains__(self, url):
+        return url_hash(url) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def is_empty(self):
+        return not self._hashes
+
+    def add_many(self, urls, first_seen=None):
+        first_seen = first_seen or datetime.now().strftime("%Y-%m-%d")
+        new = [(self.gid, h, first_seen) for h in {url_hash(u) for u in urls if u} if h not in self._hashes]
+        if not new:
+            return 0
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO seen VALUES (?, ?, ?)", new)
+            self._conn.commit()
+            self._hashes.update(h for _, h, _ in new)
+        return len(new)
+
+    def set_synced_rows(self, rows):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sync VALUES (?, ?)", (self.gid, rows))
+            self._conn.commit()
+            self.synced_rows = rows
+
+
+def get_index(gid):
+    # 같은 프로세스(통합 러너)에서는 gid별 인덱스를 한 번만 불러옵니다.
+    gid = str(gid)
+    with _lock:
+        if gid not in _indexes:
+            _indexes[gid] = SeenIndex(gid)
+        return _indexes[gid]
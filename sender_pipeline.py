@@ -0,0 +1,32 @@
+import time
+import random
+import threading
+from urllib.parse import urlparse
+from run_report import record
+
+# =========================================================
+# [공통] Sender 파이프라인 도우미
+# 단계 실행은 async_engine.run_pipeline이 맡고, 여기에는 단계 함수들이 함께 쓰는 도구만 둡니다.
+# =========================================================
+
+
+# [공통] 호스트별 예의 대기 (전역 sleep 대신 같은 호스트 요청 사이에만 간격을 둡니다)
+class HostThrottle:
+    def __init__(self, min_delay=3.0, max_delay=5.0):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._next_at = {}
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at.get(host, now))
+            # 다음 요청이 가능한 시각을 미리 예약해 두어 워커끼리 겹치지 않게 합니다.
+            self._next_at[host] = start + random.uniform(self.min_delay, self.max_delay)
+        delay = start - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+            record("throttle_wait", delay)
+
@@ -0,0 +1,204 @@
+import os
+import re
+import json
+import time
+import threading
+import gspread
+from gspread.utils import rowcol_to_a1
+from oauth2client.service_account import ServiceAccountCredentials
+from rate_limiter import get_limiter
+from run_report import span
+
+SPREADSHEET_URL = "https://docs.google.com/spreadsheets/d/1nKPVCZ6zAOfpqCjV6WfjkzCI55FA9r2yvi9XL3iIneo/edit"
+SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+
+# 실행 간에 유지하는 로컬 캐시 폴더 (GitHub Actions에서는 actions/cache로 보존)
+CACHE_DIR = os.environ.get("FLINT_CACHE_DIR", ".cache")
+WORKSHEET_CACHE_PATH = os.path.join(CACHE_DIR, "worksheets.json")
+WORKSHEET_CACHE_TTL = 24 * 60 * 60  # 탭 목록은 하루 동안 재사용
+
+_lock = threading.Lock()
+_client = None
+_spreadsheet = None
+_worksheets = {}
+
+
+# =========================================================
+# [공통] 인증 및 워크시트 조회
+# 한 프로세스 안에서는 인증과 스프레드시트 조회를 한 번만 하고,
+# gid → 워크시트 매핑은 메모리와 디스크(TTL)에 캐시합니다.
+# =========================================================
+def get_client():
+    global _client
+    with _lock:
+        if _client is None:
+            if 'GOOGLE_CREDENTIALS' not in os.environ:
+                raise Exception("환경변수 GOOGLE_CREDENTIALS가 설정되지 않았습니다.")
+            creds_dict = json.loads(os.environ['GOOGLE_CREDENTIALS'])
+            creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
+            _client = gspread.authorize(creds)
+        return _client
+
+
+def get_spreadsheet():
+    global _spreadsheet
+    client = get_client()
+    with _lock:
+        if _spreadsheet is None:
+            _spreadsheet = client.open_by_url(SPREADSHEET_URL)
+        return _spreadsheet
+
+
+def _load_worksheet_cache():
+    try:
+        with open(WORKSHEET_CACHE_PATH, encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if time.time() - cached.get("saved_at", 0) > WORKSHEET_CACHE_TTL:
+        return {}
+    return cached.get("sheets", {})
+
+
+def _save_worksheet_cache(sheets):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(WORKSHEET_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "sheets": sheets}, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"⚠️ 워크시트 캐시 저장 실패: {e}")
+
+
+def get_worksheet(gid):
+    gid = str(gid)
+    spreadsheet = get_spreadsheet()
+    with _lock:
+        if gid in _worksheets:
+            return _worksheets[gid]
+
+        # 1) 디스크 캐시에 저장된 탭 속성으로 바로 생성 (메타데이터 조회 생략)
+        properties = _load_worksheet_cache().get(gid)
+
+        # 2) 캐시에 없으면 메타데이터를 한 번 조회해 모든 탭을 함께 캐시
+        if properties is None:
+            metadata = spreadsheet.fetch_sheet_metadata()
+            sheets = {str(s["properties"]["sheetId"]): s["properties"] for s in metadata["sheets"]}
+            _save_worksheet_cache(sheets)
+            properties = sheets.get(gid)
+
+        if properties is None:
+            raise Exception(f"{gid} 시트를 못 찾았습니다.")
+        sheet = gspread.Worksheet(spreadsheet, properties, spreadsheet.id, spreadsheet.client)
+        _worksheets[gid] = sheet
+        return sheet
+
+
+# =========================================================
+# [공통] 열 단위 읽기
+# get_all_values로 시트 전체를 받는 대신, 헤더(1행)에서 필요한 열의 위치를 찾아
+# 그 열들만 batch_get 한 번으로 받습니다. 시트가 계속 커져도 받는 양은 필요한 열만큼입니다.
+# start_row/extra_rows로 이미 처리가 끝난 앞쪽 행은 건너뛸 수 있습니다.
+# =========================================================
+def _col_letter(col):
+    return re.sub(r"\d+$", "", rowcol_to_a1(1, col))
+
+
+def read_columns(sheet, names, optional=(), start_row=2, extra_rows=()):
+    """
+    반환값: (headers, rows)
+    - headers: 1행의 헤더 목록 (앞뒤 공백 제거, 열 번호 계산용)
+    - rows: (시트 행 번호, names 순서의 값...) 튜플 목록 (행 번호 순). 빈 칸과 optional 중 없는 열은 ""입니다.
+    start_row부터 끝까지의 행과, 그 앞쪽에서 따로 볼 행(extra_rows)만 읽습니다 (status_index 참고).
+    names 중 optional이 아닌 열이 없으면 예외를 냅니다.
+    """
+    with span("sheet_read"):
+        return _read_columns(sheet, names, optional, start_row, extra_rows)
+
+
+def _read_columns(sheet, names, optional, start_row, extra_rows):
+    headers = [h.strip() for h in sheet.row_values(1)]
+    missing = [name for name in names if name not in headers and name not in optional]
+    if missing:
+        raise Exception(f"{missing} 컬럼을 찾을 수 없습니다.")
+
+    present = [name for name in names if name in headers]
+    if not present:
+        return headers, []
+    cols = {name: headers.index(name) + 1 for name in present}
+    extra_rows = sorted(r for r in set(extra_rows) if 2 <= r < start_row)
+    first, last = min(cols.values()), max(cols.values())
+
+    # 열마다 start_row 이후 전체, 앞쪽 행은 필요한 열을 모두 덮는 한 줄 범위로 요청합니다.
+    ranges = [f"{_col_letter(c)}{start_row}:{_col_letter(c)}" for c in cols.values()]
+    ranges += [f"{_col_letter(first)}{r}:{_col_letter(last)}{r}" for r in extra_rows]
+    # COLUMNS 기준이라 범위마다 [[열의 첫 값, 다음 값, ...], ...] 형태로 옵니다 (끝쪽 빈 칸은 잘려서 옴).
+    results = sheet.batch_get(ranges, major_dimension="COLUMNS")
+    columns = {name: (value_range[0] if value_range else []) for name, value_range in zip(present, results)}
+
+    def pick(value_range, name):
+        # 앞쪽 행 범위에서 name 열의 값 (범위 안 열마다 [값], 빈 열은 [])
+        if name not in cols:
+            return ""
+        i = cols[name] - first
+        return value_range[i][0] if i < len(value_range) and value_range[i] else ""
+
+    rows = [(r, *[pick(value_range, name) for name in names])
+            for r, value_range in zip(extra_rows, results[len(present):])]
+
+    height = max((len(values) for values in columns.values()), default=0)
+    for i in range(height):
+        values = [columns[name][i] if name in columns and i < len(columns[name]) else "" for name in names]
+        rows.append((start_row + i, *values))
+    return headers, rows
+
+
+# =========================================================
+# [공통] 시트 쓰기 버퍼
+# update_cell을 셀마다 바로 호출하는 대신 변경 내용을 모아 두었다가
+# batch_update 한 번(API 호출 1회)으로 기록합니다.
+# on_flush를 주면 기록이 끝날 때마다 기록된 셀 목록 [(row, col, value), ...]으로 호출합니다.
+# =========================================================
+class SheetWriteBuffer:
+    def __init__(self, sheet, flush_every=20, on_flush=None):
+        self.sheet = sheet
+        self.flush_every = flush_every
+        self.on_flush = on_flush
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._rows = set()
+
+    def update_cell(self, row, col, value):
+        # sheet.update_cell과 같은 인자를 받으며, 같은 셀은 마지막 값만 기록됩니다.
+        with self._lock:
+            self._pending[(row, col)] = value
+            self._rows.add(row)
+            if self.flush_every and len(self._rows) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        data = [
+            {'range': rowcol_to_a1(row, col), 'values': [[value]]}
+            for (row, col), value in sorted(self._pending.items())
+        ]
+        # 쓰기 한도 초과(429)는 sheets 한도 관리자가 Retry-After/백오프만큼만 기다렸다가 재시도합니다.
+        with span("sheet_write"):
+            get_limiter("sheets").call(self.sheet.batch_update, data, value_input_option='USER_ENTERED')
+        print(f"💾 시트 {len(self._rows)}개 행 ({len(data)}개 셀) 일괄 기록")
+        if self.on_flush:
+            self.on_flush([(row, col, value) for (row, col), value in sorted(self._pending.items())])
+        self._pending.clear()
+        self._rows.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 실행 중 오류가 나도 모아 둔 변경 내용은 반드시 기록합니다.
+        self.flush()
+        return False
@@ -1,205 +1,338 @@
 import os
 import sys
-import json
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import pandas as pd
 import requests
-from bs4 import BeautifulSoup
 from openai import OpenAI
-import random
-import time
+from sender_pipeline import HostThrottle
+from async_engine import run_pipeline, run_blocking, openai_http_client
+from rate_limiter import get_limiter, limiter_stats
+from http_cache import get_cache
+from text_extract import EXTRACT_VERSION, BlockExtractor
+from llm_utils import get_llm_cache, llm_call, with_content, build_combined_prompt, combined_schema
+from openai_batch import BatchRunner, prefetch_texts
+import run_report
+from run_journal import RunJournal
+from slack_digest import SlackDigest
+from sheet_utils import SheetWriteBuffer, get_worksheet
+from status_index import StatusIndex
+from near_dup import NearDupIndex
 
 # =========================================================
-# 1. 설정 및 인증
+# 1. 설정
 # =========================================================
-had_fatal_error = False
-try:
-    print("--- [Side Sender] 전체 자동화 프로세스를 시작합니다 ---")
+# 컬럼 설정
+COL_STATUS = 'status'
+COL_IDENTITY = 'identity_match'
+COL_TITLE = 'title'     
+COL_URL = 'url'         
+COL_LOCATION = 'location' 
+
+# 단계별 동시 처리 워커 수
+FETCH_WORKERS = 3
+LLM_WORKERS = 4
+
+# LLM 호출 방식: "combined"(판단+요약을 한 번에, 기본) / "split"(판단 후 적합할 때만 요약)
+LLM_MODE = os.environ.get("LLM_MODE", "combined")
+
+# 배치 모드: LLM 요청을 OpenAI Batch API로 한 번에 처리 (야간 실행용, 결과가 늦으면 다음 실행에서 이어감)
+LLM_BATCH = os.environ.get("LLM_BATCH", "0") == "1"
+
+
+# 시트 변경 내용을 모아서 기록할 행 수 (종료·오류 시에도 남은 내용은 기록)
+FLUSH_EVERY = 20
+
+# [차단 우회] 강력한 브라우저 위장 헤더
+HEADERS_UA = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Referer': 'https://www.google.com/',
+    'Connection': 'keep-alive'
+}
+
+# 봇 감지 방지 랜덤 대기 (같은 호스트 요청 사이에만 적용)
+throttle = HostThrottle(3.0, 5.0)
+
+# 상세 페이지 응답 캐시 (실패 행 재시도 시 네트워크 요청·대기 생략)
+http_cache = get_cache()
+# 다른 소스에서 이미 게시·제외한 글과 거의 같은 본문은 LLM 호출 없이 'duplicate'로 처리
+near_dup = NearDupIndex("side")
+# 상세 페이지를 받으면서 추출하고, 3500자를 채우면 나머지 본문은 받지 않음
+STREAM_FETCH = True
+
+# gpt 결과 캐시 (같은 본문이면 재호출하지 않음, 결과를 새로 받으려면 버전을 올림)
+IDENTITY_PROMPT_VERSION = "v1"
+SUMMARY_PROMPT_VERSION = "v1"
+COMBINED_PROMPT_VERSION = "v1"
+llm_cache = get_llm_cache()
+
+# 슬랙 웹훅 전송 한도 (연속 전송 간격·429 재시도를 모든 행이 공유)
+slack_limiter = get_limiter("slack")
+# 슬랙 묶음 전송: 한 메시지에 담을 최대 행 수 (0이면 메시지당 50블록 한도까지)
+DIGEST_MAX_ITEMS = 0
+
+# =========================================================
+# [프롬프트] 판단·요약 지침 (본문은 호출할 때 with_content로 붙입니다)
+# =========================================================
+IDENTITY_SYSTEM = "You are a professional project analyst. Respond only in JSON format with keys: 'is_appropriate' (boolean), 'reason' (string)."
+IDENTITY_GUIDE = """
+    당신은 에디터 공동체 'ANTIEGG'의 프로젝트 큐레이터입니다. 아래 프로젝트가 '에디터들이 참여하기 적합한' 프로젝트인지 판단해 주세요.
+
+	[적합 조건 (TRUE)]
+	모집하는 포지션에 아래 직종이 하나라도 있어야 합니다.: 
+        - 마케터
+		- 콘텐츠 기획자
+		- 에디터
+		
+"""
+
+SUMMARY_SYSTEM = "Respond only in JSON format with keys: inferred_location, inferred_position, key_points(list), recommendations(list)."
+SUMMARY_GUIDE = """
+    당신은 ANTIEGG의 프로젝트 큐레이터입니다. 지적이고 세련된 어투로 아래 글을 소개해 주세요.
+    어투는 매우 정중하고 지적인 경어체 (~합니다, ~해드립니다)를 사용해 주세요. 
+    JSON 포맷으로 만들어 주세요. 
+    [지침]:      
+    1. key_points: 프로젝트의 정체성과 핵심 기능을 설명하는 문장을 3개 내외로 작성해 주세요.
+       - 첫 번째 문장 : 반드시 ‘이 프로젝트는~’을 주어로 시작해 주세요.
+       - 첫 번째 문장, 이후 : 주어를 생략하고, 앞 문맥을 자연스럽게 이어 주세요.
+       - 주의사항 : 각 불릿에는 반드시 하나의 문장만 포함해 주세요.
+       - 주의사항 : 'ANTIEGG는~'로 시작하지 마세요.
+    2. recommendations: 이 글이 꼭 필요한 에디터를 3가지 내외의 유형으로 제안해 주세요. 
+       - 주의사항 : '열심히 할 분' 같은 일반적인 말은 금지. 
+       - 문구 예시: "브랜드의 보이스앤톤을 직접 설계해보고 싶은 분", "독립 잡지 출판의 전 과정을 경험하고 싶은 분", "텍스트 기반 커뮤니티의 운영 로직을 배우고 싶은 분" 등 직무적 성장과 연결할 것.
+       - 끝맺음: "~한 분" (예: ~하는 분, ~를 찾는 분)
+       - 주의사항 : "에디터"라는 말을 직접 사용하지 말 것. 
+       - 주의사항 : 각 불릿에는 반드시 하나의 문장만 포함해 주세요.
+    3. inferred_location: 본문을 분석하여 '활동 지역' 추출 (예: 서울 강남, 온라인 등).
+    4. inferred_position: 본문을 분석하여 '모집 포지션' 추출 (예: 콘텐츠 마케터, 콘텐츠 기획자 등). 
+    
+"""
+
+# 통합 모드: 두 지침을 한 번에 보내고 스키마로 판단 결과와 요약 항목을 함께 받습니다.
+COMBINED_SYSTEM = "You are a professional project analyst. Respond only in json format following the given schema."
+COMBINED_SCHEMA = combined_schema(['key_points', 'recommendations'], ['inferred_location', 'inferred_position'])
+
+# LLM 요청 묶음 (동기 호출과 배치 제출이 같은 캐시 키를 쓰도록 한곳에서 만듭니다)
+def identity_call(truncated_text):
+    return llm_call("identity", IDENTITY_PROMPT_VERSION, IDENTITY_SYSTEM,
+                    with_content(IDENTITY_GUIDE, truncated_text), truncated_text)
+
+def summary_call(truncated_text):
+    return llm_call("summary", SUMMARY_PROMPT_VERSION, SUMMARY_SYSTEM,
+                    with_content(SUMMARY_GUIDE, truncated_text), truncated_text)
+
+def combined_call(truncated_text):
+    return llm_call("combined", COMBINED_PROMPT_VERSION, COMBINED_SYSTEM,
+                    build_combined_prompt(IDENTITY_GUIDE, SUMMARY_GUIDE, truncated_text), truncated_text,
+                    schema=COMBINED_SCHEMA)
+
+# =========================================================
+# 2. 단계별 처리 함수 (수집 → 판단 → 요약 → 전송)
+# =========================================================
+# 한 번의 순회로 대상 태그 텍스트를 중복 없이 모으고, 3500자를 채우면 멈춥니다.
+extract_text = BlockExtractor(['p', 'h2', 'h3', 'li', 'span'], min_len=10, budget=3500)
+
+def fetch_stage(item):
+    print(f"\n🔍 {item['row']}행 검토 중: {item['title']}")
+
+    # 3. [차단 우회] 브라우저 위장 및 호스트별 랜덤 대기
+    # 재시도 행은 로컬 HTTP 캐시에서 바로 꺼내고, 실제 요청이 필요할 때만 호스트별 랜덤 대기를 합니다.
+    text_content = http_cache.fetch_text(
+        session, item['url'], extract_text, headers=HEADERS_UA, timeout=15, throttle=throttle,
+        text_key=EXTRACT_VERSION, stream=STREAM_FETCH
+    )
+    item['text'] = text_content[:3500]
+    return near_dup.check(item)
+
+def classify_stage(item):
+    # 유사 중복 등으로 이미 판정된 행 (재개한 실행에서 판단을 마친 행 포함)
+    if 'is_appropriate' in item:
+        return item
+    truncated_text = item['text']
 
-    if 'GOOGLE_CREDENTIALS' not in os.environ:
-        raise Exception("환경변수 GOOGLE_CREDENTIALS가 설정되지 않았습니다.")
+    if LLM_MODE == "combined":
+        # 4+5. 판단과 요약을 한 번의 호출로 받고, 요약 항목은 적합한 행에서만 사용합니다.
+        result = llm_cache.chat_json(client_openai, **combined_call(truncated_text))
+        item['is_appropriate'] = result.get("is_appropriate", False)
+        item['drop_reason'] = result.get("reason") or "사유 미상"
+        if item['is_appropriate']:
+            item['gpt_res'] = result
+        return item
 
-    creds_dict = json.loads(os.environ['GOOGLE_CREDENTIALS'])
-    scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-    client = gspread.authorize(creds)
+    # 4. [적합성 판단] 에디팅 포지션 여부 필터링
+    judgment = llm_cache.chat_json(client_openai, **identity_call(truncated_text))
+    item['is_appropriate'] = judgment.get("is_appropriate", False)
+    return item
 
-    spreadsheet = client.open('플린트스토닝 소재 DB')
+def summarize_stage(item):
+    # 부적합 행과 통합 모드에서 이미 요약을 받은 행은 그대로 전송 단계로 넘깁니다.
+    if not item['is_appropriate'] or 'gpt_res' in item:
+        return item
+    truncated_text = item['text']
+
+    # 5. [슬랙 생성] 요약 및 추천사 (모집 포지션 관련 추출 제거)
+    item['gpt_res'] = llm_cache.chat_json(client_openai, **summary_call(truncated_text))
+    return item
+
+async def publish_stage(item):
+    update_row_index = item['row']
+    project_title = item['title']
+    target_url = item['url']
+
+    # 다른 소스에서 이미 처리한 글과 거의 같은 행은 판단·요약 없이 'duplicate'로 기록합니다.
+    # 판단을 거치지 않았으므로 identity_match는 비워 둡니다 (FALSE는 LLM이 부적합으로 판단한 행).
+    if item.get('duplicate_of'):
+        await run_blocking(writer.update_cell, update_row_index, status_col_idx, 'duplicate')
+        return None
+
+    # identity_match 업데이트
+    await run_blocking(writer.update_cell, update_row_index, identity_col_idx, str(item['is_appropriate']).upper())
+
+    # 부적합 시 status를 'dropped'로 변경하고 다음 행으로 이동
+    if not item['is_appropriate']:
+        print(f"⚠️ {update_row_index}행 부적합 판정: status를 'dropped'로 변경합니다. (사유: {item.get('drop_reason', '사유 미상')})")
+        await run_blocking(writer.update_cell, update_row_index, status_col_idx, 'dropped')
+        await run_blocking(near_dup.remember, item, 'dropped')
+        return None
+
+    gpt_res = item['gpt_res']
+
+    # --- 변수 할당 오류 수정 ---
+    inferred_position = gpt_res.get('inferred_position') or '콘텐츠 기획자'
+    final_location = item['location'] if item['location'] else (gpt_res.get('inferred_location') or '온라인 (협의 가능)')
     
+    # 6. 슬랙 전송
+    blocks = [
+        {"type": "header", "text": {"type": "plain_text", "text": "🤝사이드프로젝트 동료 찾고 있어요", "emoji": True}},
+        {"type": "section", "text": {"type": "mrkdwn", "text": f"* {project_title}*"}},
+        {
+            "type": "section",
+            "fields": [
+                {"type": "mrkdwn", "text": f"*모집 포지션*\n{inferred_position}"}, # 변수 정의 완료
+                {"type": "mrkdwn", "text": f"*지역*\n{final_location}"}
+            ]
+        },
+        {"type": "divider"},
+        # gpt_res에서 가져오는 키를 'key_points'로 일치시킴
+        {"type": "section", "text": {"type": "mrkdwn", "text": "📌 *프로젝트 요약*\n" + "\n".join([f"• {s}" for s in gpt_res.get('key_points', [])])}},
+        {"type": "section", "text": {"type": "mrkdwn", "text": "📌 *이런 분께 추천해요*\n" + "\n".join([f"• {r}" for r in gpt_res.get('recommendations', [])])}},
+        {"type": "divider"},
+        {"type": "actions", "elements": [{"type": "button", "text": {"type": "plain_text", "text": "프로젝트 보러가기", "emoji": True}, "style": "primary", "url": target_url}]}
+    ]
+
+    # 이전 실행에서 슬랙 전송까지 마치고 시트에 기록하기 전에 중단된 행은 다시 보내지 않습니다.
+    if journal.done(item, "posted"):
+        print(f"↩️ {update_row_index}행은 이미 전송됨: status만 'published'로 기록합니다.")
+        await run_blocking(writer.update_cell, update_row_index, status_col_idx, 'published')
+        await run_blocking(near_dup.remember, item, 'published')
+        return None
+
+    # 묶음 메시지에 담아 두고, 전송 결과는 on_slack_result에서 행마다 기록합니다.
+    await digest.add(item, blocks)
+    return None
+
+def on_slack_result(item, status_code):
+    # 묶음 메시지 하나의 전송 결과(상태 코드)를 그 메시지에 담긴 행마다 반영합니다.
+    update_row_index = item['row']
+    if status_code == 200:
+        journal.record(item, "posted")
+        near_dup.remember(item, 'published')
+        print(f"✅ 전송 성공: {item['title']}")
+        writer.update_cell(update_row_index, status_col_idx, 'published')
+    else:
+        print(f"❌ 슬랙 전송 실패: {status_code}")
+        writer.update_cell(update_row_index, status_col_idx, 'failed')
+
+def on_error(item, stage, e):
+    print(f"❌ {item['row']}행 처리 오류 ({stage}): {e}")
+
+# =========================================================
+# 3. 인증 및 실행
+# =========================================================
+# 종료 시 구간별 소요 시간 리포트(reports/<이름>.json)를 남깁니다.
+run_report.start()
+had_fatal_error = False
+try:
+    print("--- [Side Sender] 전체 자동화 프로세스를 시작합니다 ---")
+
+    # 인증과 탭 목록(gid 매핑)은 sheet_utils에서 한 번만 조회해 공유합니다.
     # GID 1818966683 기반 시트 선택
     TARGET_GID = 1818966683
-    sheet = next((s for s in spreadsheet.worksheets() if s.id == TARGET_GID), None)
+    sheet = get_worksheet(TARGET_GID)
     
-    if not sheet:
-        raise Exception(f"GID가 {TARGET_GID}인 워크시트를 찾을 수 없습니다.")
-    
-    data = sheet.get_all_values()
-    headers = [h.strip() for h in data[0]]
-    df = pd.DataFrame(data[1:], columns=headers)
-
-    # 컬럼 설정
-    COL_STATUS = 'status'
-    COL_IDENTITY = 'identity_match'
-    COL_TITLE = 'title'     
-    COL_URL = 'url'         
-    COL_LOCATION = 'location' 
+    # 처리가 끝난 앞쪽 행은 건너뛰고, 마지막 확인 지점 이후의 행과 예외 행의 필요한 열만 읽습니다.
+    # rows는 (행 번호, status, title, url, ...) 튜플 목록입니다.
+    status_index = StatusIndex(TARGET_GID)
+    headers, rows = status_index.read(sheet, [COL_STATUS, COL_TITLE, COL_URL, COL_LOCATION], optional=[COL_LOCATION])
 
     # 'archived' 상태인 모든 프로젝트 추출
-    target_rows = df[df[COL_STATUS].str.strip().str.lower() == 'archived']
+    target_rows = [r for r in rows if r[1].strip().lower() == 'archived']
 
-    if target_rows.empty:
+    if not target_rows:
         print("ℹ️ 처리할 'archived' 상태의 프로젝트가 없습니다.")
+        status_index.save()
         exit()
 
     print(f"총 {len(target_rows)}건의 프로젝트 처리를 시작합니다.")
 
     identity_col_idx = headers.index(COL_IDENTITY) + 1
     status_col_idx = headers.index(COL_STATUS) + 1
-    client_openai = OpenAI(api_key=os.environ['OPENAI_API_KEY'])
+    client_openai = OpenAI(api_key=os.environ['OPENAI_API_KEY'], http_client=openai_http_client())
     webhook_url = os.environ['SLACK_MOJIPGONGGO']
     
     session = requests.Session()
 
+    items = [
+        {'row': row, 'title': title, 'url': url, 'location': location.strip()}
+        for row, _, title, url, location in target_rows
+    ]
+
     # =========================================================
-    # 2. 메인 루프: 모든 'archived' 행을 끝까지 순회합니다.
+    # (배치 모드) 본문을 먼저 모두 수집하고, 행마다 필요한 LLM 요청을 배치로 처리해 캐시를 채웁니다.
+    # 분리 모드는 판단 배치 뒤에 적합한 행의 요약 배치를 한 번 더 보냅니다.
+    # 이어지는 파이프라인은 본문(HTTP 캐시)과 gpt 결과(LLM 캐시)를 바로 꺼내 씁니다.
     # =========================================================
-    for index, row in target_rows.iterrows():
-        update_row_index = int(index) + 2
-        project_title = row[COL_TITLE]
-        target_url = row[COL_URL]
-        sheet_location = row.get(COL_LOCATION, "").strip() 
-        
-        print(f"\n🔍 {update_row_index}행 검토 중: {project_title}")
-
-        try:
-            # 3. [차단 우회] 강력한 브라우저 위장 및 랜덤 대기
-            headers_ua = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7',
-                'Referer': 'https://www.google.com/',
-                'Connection': 'keep-alive'
-            }
-
-            # 봇 감지 방지 랜덤 대기
-            time.sleep(random.uniform(3.0, 5.0))
-
-            resp = session.get(target_url, headers=headers_ua, timeout=15)
-            resp.raise_for_status()
-            
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            text_content = " ".join([p.get_text().strip() for p in soup.find_all(['p', 'h2', 'h3', 'li', 'span']) if len(p.get_text().strip()) > 10])
-            truncated_text = text_content[:3500]
-
-            # 4. [적합성 판단] 에디팅 포지션 여부 필터링
-            identity_prompt = f"""
-            당신은 에디터 공동체 'ANTIEGG'의 프로젝트 큐레이터입니다. 아래 프로젝트가 '에디터들이 참여하기 적합한' 프로젝트인지 판단해 주세요.
-
-			[적합 조건 (TRUE)]
-			모집하는 포지션에 아래 직종이 하나라도 있어야 합니다.: 
-	            - 마케터
-				- 콘텐츠 기획자
-				- 에디터
-				
-            [내용] {truncated_text}
-            """
-            check_res = client_openai.chat.completions.create(
-                model="gpt-4o-mini",
-                response_format={ "type": "json_object" },
-                messages=[
-                    {"role": "system", "content": "You are a professional project analyst. Respond only in JSON format with keys: 'is_appropriate' (boolean), 'reason' (string)."},
-                    {"role": "user", "content": identity_prompt}
-                ]
-            )
-            judgment = json.loads(check_res.choices[0].message.content)
-            is_appropriate = judgment.get("is_appropriate", False)
-            
-            # identity_match 업데이트
-            time.sleep(1)
-            sheet.update_cell(update_row_index, identity_col_idx, str(is_appropriate).upper())
-
-            # 부적합 시 status를 'dropped'로 변경하고 다음 행으로 이동
-            if not is_appropriate:
-                print(f"⚠️ 부적합 판정: status를 'dropped'로 변경합니다.")
-                sheet.update_cell(update_row_index, status_col_idx, 'dropped')
-                continue
-
-            # 5. [슬랙 생성] 요약 및 추천사 (모집 포지션 관련 추출 제거)
-            key_points_prompt = f"""
-            당신은 ANTIEGG의 프로젝트 큐레이터입니다. 지적이고 세련된 어투로 아래 글을 소개해 주세요.
-            어투는 매우 정중하고 지적인 경어체 (~합니다, ~해드립니다)를 사용해 주세요. 
-            JSON 포맷으로 만들어 주세요. 
-            [지침]:      
-            1. key_points: 프로젝트의 정체성과 핵심 기능을 설명하는 문장을 3개 내외로 작성해 주세요.
-               - 첫 번째 문장 : 반드시 ‘이 프로젝트는~’을 주어로 시작해 주세요.
-               - 첫 번째 문장, 이후 : 주어를 생략하고, 앞 문맥을 자연스럽게 이어 주세요.
-               - 주의사항 : 각 불릿에는 반드시 하나의 문장만 포함해 주세요.
-               - 주의사항 : 'ANTIEGG는~'로 시작하지 마세요.
-            2. recommendations: 이 글이 꼭 필요한 에디터를 3가지 내외의 유형으로 제안해 주세요. 
-               - 주의사항 : '열심히 할 분' 같은 일반적인 말은 금지. 
-               - 문구 예시: "브랜드의 보이스앤톤을 직접 설계해보고 싶은 분", "독립 잡지 출판의 전 과정을 경험하고 싶은 분", "텍스트 기반 커뮤니티의 운영 로직을 배우고 싶은 분" 등 직무적 성장과 연결할 것.
-               - 끝맺음: "~한 분" (예: ~하는 분, ~를 찾는 분)
-               - 주의사항 : "에디터"라는 말을 직접 사용하지 말 것. 
-               - 주의사항 : 각 불릿에는 반드시 하나의 문장만 포함해 주세요.
-            3. inferred_location: 본문을 분석하여 '활동 지역' 추출 (예: 서울 강남, 온라인 등).
-            4. inferred_position: 본문을 분석하여 '모집 포지션' 추출 (예: 콘텐츠 마케터, 콘텐츠 기획자 등). 
-            
-            [내용] {truncated_text}
-            """
-            
-            key_points_res = client_openai.chat.completions.create(
-                model="gpt-4o-mini",
-                response_format={ "type": "json_object" },
-                messages=[
-                    {"role": "system", "content": "Respond only in JSON format with keys: inferred_location, inferred_position, key_points(list), recommendations(list)."},
-                    {"role": "user", "content": key_points_prompt}
-                ]
-            )
-            gpt_res = json.loads(key_points_res.choices[0].message.content)
-            
-            # --- 변수 할당 오류 수정 ---
-            inferred_position = gpt_res.get('inferred_position', '콘텐츠 기획자')
-            final_location = sheet_location if sheet_location else gpt_res.get('inferred_location', '온라인 (협의 가능)')
-            
-            # 6. 슬랙 전송
-            blocks = [
-                {"type": "header", "text": {"type": "plain_text", "text": "🤝사이드프로젝트 동료 찾고 있어요", "emoji": True}},
-                {"type": "section", "text": {"type": "mrkdwn", "text": f"* {project_title}*"}},
-                {
-                    "type": "section",
-                    "fields": [
-                        {"type": "mrkdwn", "text": f"*모집 포지션*\n{inferred_position}"}, # 변수 정의 완료
-                        {"type": "mrkdwn", "text": f"*지역*\n{final_location}"}
-                    ]
-                },
-                {"type": "divider"},
-                # gpt_res에서 가져오는 키를 'key_points'로 일치시킴
-                {"type": "section", "text": {"type": "mrkdwn", "text": "📌 *프로젝트 요약*\n" + "\n".join([f"• {s}" for s in gpt_res.get('key_points', [])])}},
-                {"type": "section", "text": {"type": "mrkdwn", "text": "📌 *이런 분께 추천해요*\n" + "\n".join([f"• {r}" for r in gpt_res.get('recommendations', [])])}},
-                {"type": "divider"},
-                {"type": "actions", "elements": [{"type": "button", "text": {"type": "plain_text", "text": "프로젝트 보러가기", "emoji": True}, "style": "primary", "url": target_url}]}
-            ]
-                 
-            
-            slack_resp = requests.post(webhook_url, json={"blocks": blocks})
-            
-            if slack_resp.status_code == 200:
-                print(f"✅ 전송 성공: {project_title}")
-                time.sleep(1)
-                sheet.update_cell(update_row_index, status_col_idx, 'published')
-            else:
-                print(f"❌ 슬랙 전송 실패: {slack_resp.status_code}")
-                sheet.update_cell(update_row_index, status_col_idx, 'failed')
-
-            # 모든 행을 처리하기 위해 대기 후 다음 루프로 진행
-            time.sleep(1.5)
-
-        except Exception as e:
-            print(f"❌ {update_row_index}행 처리 오류: {e}")
-            if "429" in str(e): 
-                time.sleep(60)
-            continue
+    if LLM_BATCH:
+        fetched = prefetch_texts(items, fetch_stage, FETCH_WORKERS)
+        batch = BatchRunner(client_openai, llm_cache, "side")
+        if LLM_MODE == "combined":
+            done = batch.prefill([combined_call(i['text']) for i in fetched])
+        else:
+            done = batch.prefill_split([(identity_call(i['text']), summary_call(i['text'])) for i in fetched])
+        if not done:
+            print("ℹ️ 배치 결과를 기다리는 중이라 이번 실행에서는 전송하지 않습니다.")
+            exit()
+
+    # =========================================================
+    # 4. 파이프라인 실행: 모든 'archived' 행을 단계별로 동시에 처리합니다.
+    # 슬랙 전송은 전송 단계의 단일 워커가 순서대로 담당하고, 시트 변경은 모아서 일괄 기록합니다.
+    # =========================================================
+    # 중단된 이전 실행의 진행 상황을 이어받고, 단계를 마칠 때마다 저널에 기록합니다.
+    journal = RunJournal("side")
+    journal.resume(items)
+
+    # 승인된 행은 블록 한도 안에서 묶어 웹훅 메시지 몇 건으로 보냅니다.
+    digest = SlackDigest(webhook_url, slack_limiter, on_slack_result, max_items=DIGEST_MAX_ITEMS)
+
+    # status 셀이 시트에 기록되면 저널에는 완료로, 상태 인덱스에는 새 상태로 반영합니다.
+    def on_flush(cells):
+        statuses = [(row, value) for row, col, value in cells if col == status_col_idx]
+        journal.mark_written(row for row, _ in statuses)
+        status_index.update(statuses)
+
+    with SheetWriteBuffer(sheet, flush_every=FLUSH_EVERY, on_flush=on_flush) as writer:
+        run_pipeline(items, [
+            ("fetch", journal.stage("fetched", fetch_stage), FETCH_WORKERS),
+            ("classify", journal.stage("classified", classify_stage), LLM_WORKERS),
+            ("summarize", journal.stage("summarized", summarize_stage), LLM_WORKERS),
+            ("publish", publish_stage, 1),
+        ], on_error=on_error, on_finish=digest.flush)
+    journal.close()
+    status_index.save()
+    print(http_cache.stats())
+    print(near_dup.stats())
+    print(llm_cache.stats())
+    print(digest.stats())
+    print(limiter_stats())
 
 except Exception as e:
     print(f"❌ 치명적 오류: {e}")
@@ -0,0 +1,83 @@
+from async_engine import post_json, run_blocking
+from run_report import span
+
+# =========================================================
+# [공통] 슬랙 묶음 전송
+# 승인된 행마다 웹훅 메시지를 하나씩 보내면 채널이 도배되고 웹훅 한도(초당 1건)에 걸리므로,
+# 행별 블록 목록을 모아 메시지당 블록 한도(50개) 안에서 최대한 적은 메시지로 보냅니다.
+# 전송은 publish 단계의 단일 워커와 파이프라인 종료 시(on_finish)에만 일어나며,
+# 각 메시지의 결과(상태 코드)를 그 메시지에 담긴 행마다 on_result(item, status_code)로 알려 줍니다.
+# 묶음 메시지가 실패하면 담긴 행을 한 건씩 다시 보내고, 그 결과로 행마다 성공·실패를 판정합니다.
+# on_result는 시트 쓰기(버퍼 flush)를 할 수 있으므로 이벤트 루프 밖(run_blocking)에서 호출합니다.
+# (Incoming Webhook은 메시지 ts를 돌려주지 않아 스레드 답글로는 묶을 수 없습니다.)
+# =========================================================
+SLACK_MAX_BLOCKS = 50
+
+
+class SlackDigest:
+    def __init__(self, webhook_url, limiter, on_result, max_items=0, payload=None, max_blocks=SLACK_MAX_BLOCKS):
+        self.webhook_url = webhook_url
+        self.limiter = limiter
+        self.on_result = on_result
+        self.max_items = max_items          # 0이면 블록 한도까지 담습니다.
+        self.payload = payload or {}        # icon_emoji, username 등 메시지 공통 항목
+        self.max_blocks = max_blocks
+        self._entries = []                  # (item, 행의 블록 목록)
+        self._size = 0                      # 지금까지 모은 블록 수 (구분선 포함)
+        self.messages = self.sent = self.failed = self.retried = 0
+
+    async def add(self, item, blocks):
+        # 이번 행을 더하면 한도를 넘는 경우에만 지금까지 모은 메시지를 먼저 보냅니다.
+        needed = len(blocks) + (1 if self._entries else 0)
+        if self._entries and (self._size + needed > self.max_blocks
+                              or (self.max_items and len(self._entries) >= self.max_items)):
+            await self.flush()
+        self._size += len(blocks) + (1 if self._entries else 0)
+        self._entries.append((item, blocks))
+
+    async def _post(self, blocks, count):
+        self.messages += 1
+        try:
+            with span("slack_post"):
+                resp = await post_json(self.webhook_url, dict(self.payload, blocks=blocks), limiter=self.limiter)
+            return resp.status_code
+        except Exception as e:
+            print(f"❌ 슬랙 전송 오류 ({count}건): {e}")
+            return None
+
+    async def flush(self):
+        if not self._entries:
+            return
+        entries, self._entries, self._size = self._entries, [], 0
+
+        blocks = []
+        for _, item_blocks in entries:
+            if blocks:
+                blocks.append({"type": "divider"})     # 항목 사이 구분선
+            blocks.extend(item_blocks)
+        status_code = await self._post(blocks, len(entries))
+        if status_code == 200:
+            print(f"📨 슬랙 메시지 1건으로 {len(entries)}건 전송 ({len(blocks)}블록)")
+            results = [(item, status_code) for item, _ in entries]
+        elif len(entries) == 1:
+            results = [(entries[0][0], status_code)]
+        else:
+            # 묶음 하나가 거절되면(블록 하나의 형식 오류 등) 행마다 따로 보내, 문제 있는 행만 실패로 남깁니다.
+            print(f"⚠️ 슬랙 묶음 전송 실패({status_code}): {len(entries)}건을 한 건씩 다시 보냅니다.")
+            self.retried += len(entries)
+            results = [(item, await self._post(item_blocks, 1)) for item, item_blocks in entries]
+
+        for _, code in results:
+            if code == 200:
+                self.sent += 1
+            else:
+                self.failed += 1
+        await run_blocking(self._report, results)
+
+    def _report(self, results):
+        for item, status_code in results:
+            self.on_result(item, status_code)
+
+    def stats(self):
+        retried = f" (묶음 실패 후 개별 재전송 {self.retried}건)" if self.retried else ""
+        return f"📨 슬랙: 메시지 {self.messages}건으로 {self.sent}건 전송 / 실패 {self.failed}건{retried}"
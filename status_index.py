@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import threading
+from sheet_utils import CACHE_DIR, read_columns
+
+# =========================================================
+# [공통] 상태 인덱스 (gid별 처리 완료 지점)
+# 스크래퍼는 append_rows로 시트 맨 아래에만 행을 붙이므로, 'archived' 행은 거의 항상 끝쪽에 있습니다.
+# 모든 행이 끝난 상태(published/dropped/failed/duplicate)인 마지막 지점(watermark)과
+# 그 앞에서 아직 끝나지 않은 소수의 예외 행만 기록해 두고,
+# sender는 watermark 다음 행부터 끝까지와 예외 행만 읽습니다 (읽는 양이 시트 크기가 아니라 새 행 수에 비례).
+# 시트를 손으로 고친 경우를 위해 FULL_SCAN_EVERY마다 한 번은 전체를 다시 확인합니다.
+# =========================================================
+INDEX_PATH = os.path.join(CACHE_DIR, "status_index.json")
+TERMINAL_STATUSES = ("published", "dropped", "failed", "duplicate")
+MAX_EXCEPTIONS = 30     # 예외 행이 이보다 많으면 watermark를 그 앞에서 멈춥니다.
+FULL_SCAN_EVERY = 7 * 24 * 60 * 60
+
+
+def _load_all(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class StatusIndex:
+    def __init__(self, gid, path=INDEX_PATH):
+        self.gid = str(gid)
+        self.path = path
+        saved = _load_all(path).get(self.gid, {})
+        self.watermark = saved.get("watermark", 1)      # 1이면 헤더만 확인된 상태 (처음부터 읽음)
+        self.exceptions = saved.get("exceptions", [])
+        self.full_scan_at = saved.get("full_scan_at", 0)
+        self._lock = threading.Lock()
+        self._statuses = {}
+        self._last_row = self.watermark
+        self._full = False
+
+    def read(self, sheet, names, optional=(), status_name="status"):
+        """
+        read_columns와 같은 (headers, rows)를 반환하되, 처리가 끝난 앞쪽 행은 읽지 않습니다.
+        읽은 행의 status는 save()에서 새 watermark를 계산하는 데 씁니다.
+        """
+        self._full = time.time() - self.full_scan_at >= FULL_SCAN_EVERY
+        start_row = 2 if self._full else self.watermark + 1
+        headers, rows = read_columns(sheet, names, optional, start_row=start_row,
+                                     extra_rows=() if self._full else self.exceptions)
+
+        pos = names.index(status_name) + 1
+        with self._lock:
+            for row in rows:
+                if any(row[1:]):    # 완전히 빈 행은 건너뜁니다.
+                    self._statuses[row[0]] = row[pos].strip().lower()
+        self._last_row = max([start_row - 1] + [row[0] for row in rows])
+
+        if self._full:
+            print(f"📑 [{self.gid}] 상태 인덱스: 전체 {len(rows)}행 다시 확인")
+        else:
+            print(f"📑 [{self.gid}] 상태 인덱스: {start_row}행부터 {len(rows)}행 읽음 (앞쪽 예외 행 {len(self.exceptions)}개 포함)")
+        return headers, rows
+
+    def update(self, statuses):
+        # SheetWriteBuffer(on_flush=...)에서 호출: 시트에 기록된 (행 번호, status)를 반영합니다.
+        with self._lock:
+            for row, value in statuses:
+                self._statuses[row] = str(value).strip().lower()
+
+    def save(self):
+        with self._lock:
+            pending = sorted(row for row, status in self._statuses.items() if status not in TERMINAL_STATUSES)
+        watermark = self._last_row
+        if len(pending) > MAX_EXCEPTIONS:
+            watermark = pending[MAX_EXCEPTIONS] - 1
+            pending = pending[:MAX_EXCEPTIONS]
+
+        self.watermark, self.exceptions = watermark, pending
+        if self._full:
+            self.full_scan_at = time.time()
+
+        indexes = _load_all(self.path)
+        indexes[self.gid] = {
+            "watermark": self.watermark,
+            "exceptions": self.exceptions,
+            "full_scan_at": self.full_scan_at,
+            "saved_at": time.time(),
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(indexes, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"⚠️ 상태 인덱스 저장 실패: {e}")
+            return
+        print(f"📑 [{self.gid}] 상태 인덱스 저장: {self.watermark}행까지 완료 (예외 행 {len(self.exceptions)}개)")
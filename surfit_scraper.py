@@ -1,103 +1,106 @@
-import os, time, json, re
-import gspread
+import time
 from datetime import datetime
-from oauth2client.service_account import ServiceAccountCredentials
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin
+import sheet_utils
+import run_report
+import capture
+from run_report import record, span
+from scraper_utils import get_driver, fetch_html, scrape_with_strategy, scroll_and_wait, append_new_rows, ResultCollector
 
 # [설정] 이 파일 전용 정보
 CONFIG = {
     "name": "서핏(Surfit)",
     "url": "https://www.surfit.io/explore/marketing/content",
-    "gid": "2112710663" # 서핏 탭
+    "gid": "2112710663", # 서핏 탭
+    "fetch": "auto" # 카드가 정적 HTML에 있으면 브라우저 없이 수집
 }
 
 # [공통] 시트 연결 (GID로 찾기)
 def get_worksheet():
-    scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-    creds_dict = json.loads(os.environ['GOOGLE_CREDENTIALS'])
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-    client = gspread.authorize(creds)
-    spreadsheet = client.open_by_url("https://docs.google.com/spreadsheets/d/1nKPVCZ6zAOfpqCjV6WfjkzCI55FA9r2yvi9XL3iIneo/edit")
-    # 순서가 바뀌어도 ID로 탭을 찾음
-    sheet = next((s for s in spreadsheet.worksheets() if str(s.id) == CONFIG["gid"]), None)
-    if not sheet: raise Exception(f"{CONFIG['gid']} 시트를 못 찾았습니다.")
-    return sheet
+    # 인증과 탭 목록(gid 매핑)은 sheet_utils에서 한 번만 조회해 공유합니다.
+    return sheet_utils.get_worksheet(CONFIG["gid"])
 
-# [공통] 브라우저 실행
-def get_driver():
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    driver = webdriver.Chrome(options=options)
-    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"})
-    return driver
+# [전용] 데이터 수집 (정적 HTML 우선, 실패 시 브라우저)
+def scrape_projects(driver=None):
+    return scrape_with_strategy(CONFIG, scrape_static, scrape_browser, driver)
 
-def scrape_projects():
-    driver = get_driver()
-    new_data = []
+# [전용] 정적 수집: requests + BeautifulSoup
+def scrape_static():
+    collector = ResultCollector()
+    today = datetime.now().strftime("%Y-%m-%d")
+    soup = BeautifulSoup(fetch_html(CONFIG["url"]), 'html.parser')
+
+    # 카드 내부에서 제목과 링크가 있는 클래스명 'title'인 a 태그 추출
+    for title_element in soup.select("article.ct-item a.title"):
+        link = title_element.get('href')
+        if not link: continue
+        link = urljoin(CONFIG["url"], link)
+        if link in collector: continue
+        title = title_element.get_text(strip=True)
+        if title:
+            collector.add({'title': title, 'url': link, 'scraped_at': today})
+    return collector.items()
+
+# [전용] 브라우저 수집
+def scrape_browser(driver=None):
+    # 러너가 넘겨준 브라우저(탭)가 있으면 재사용하고, 없으면 직접 띄웁니다.
+    own_driver = driver is None
+    if own_driver: driver = get_driver()
+    collector = ResultCollector()
     today = datetime.now().strftime("%Y-%m-%d")
     
     try:
-        driver.get(CONFIG["url"])
-        # 메인 콘텐츠 영역이 나타날 때까지 대기
-        wait = WebDriverWait(driver, 10)
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "article.ct-item")))
+        with span("page_load"):
+            driver.get(capture.listing_url(CONFIG["url"]))
+            # 메인 콘텐츠 영역이 나타날 때까지 대기
+            wait = WebDriverWait(driver, 10)
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "article.ct-item")))
 
-        # 스크롤 로직 (필요에 따라 횟수 조절)
-        for _ in range(3):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1.5)
+        # 스크롤 로직 (필요에 따라 횟수 조절, 새 카드가 없으면 바로 중단)
+        scroll_and_wait(driver, "article.ct-item", max_scrolls=3, step_timeout=1.5)
         
+        capture.save_listing(driver, CONFIG["url"])
         # 콘텐츠 카드 수집
+        extract_started = time.perf_counter()
         articles = driver.find_elements(By.CSS_SELECTOR, "article.ct-item")
         
         for art in articles:
             try:
                 # 카드 내부에서 제목과 링크가 있는 클래스명 'title'인 a 태그 추출
                 title_element = art.find_element(By.CSS_SELECTOR, "a.title")
-                title = title_element.text.strip()
                 link = title_element.get_attribute("href")
+                # 중복 체크는 제목을 읽기 전에 먼저 수행
+                if not link or link in collector: continue
+                title = title_element.text.strip()
 
-                if title and link:
-                    # 중복 체크 후 리스트 추가
-                    if not any(d['url'] == link for d in new_data):
-                        new_data.append({
-                            'title': title, 
-                            'url': link, 
-                            'scraped_at': today
-                        })
+                if title:
+                    collector.add({
+                        'title': title, 
+                        'url': link, 
+                        'scraped_at': today
+                    })
             except Exception as e:
                 # 썸네일만 있고 제목이 없는 특수 케이스 등을 대비해 패스
                 continue
+        record("extract", time.perf_counter() - extract_started)
 
     finally: 
-        driver.quit()
+        if own_driver: driver.quit()
     
-    print(f"🔎 총 {len(new_data)}개의 유효 콘텐츠 발견")
-    return new_data
+    print(f"🔎 총 {len(collector)}개의 유효 콘텐츠 발견")
+    return collector.items()
     
 # [공통] 스마트 저장 (헤더 이름 기준)
 def update_sheet(ws, data):
     if not data: return print(f"[{CONFIG['name']}] 새 공고 없음")
-    all_v = ws.get_all_values()
-    headers = all_v[0] if all_v else ['title', 'url', 'scraped_at', 'status', 'location']
-    col_map = {name: i for i, name in enumerate(headers)}
-    existing_urls = {row[col_map['url']] for row in all_v[1:] if len(row) > col_map['url']}
-    
-    rows = []
-    for item in data:
-        if item['url'] in existing_urls: continue
-        row = [''] * len(headers)
-        for k, v in item.items():
-            if k in col_map: row[col_map[k]] = v
-        if 'status' in col_map: row[col_map['status']] = 'archived'
-        rows.append(row)
-    
-    if rows: ws.append_rows(rows); print(f"💾 {CONFIG['name']} {len(rows)}건 저장")
+    # 중복 판정은 로컬 URL 인덱스로 하고, 시트에는 새 행만 추가합니다.
+    count = append_new_rows(ws, data, CONFIG["gid"], ['title', 'url', 'scraped_at', 'status', 'location'])
+    if count: print(f"💾 {CONFIG['name']} {count}건 저장")
 
 if __name__ == "__main__":
+    run_report.start()
     ws = get_worksheet(); data = scrape_projects(); update_sheet(ws, data)
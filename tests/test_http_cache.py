@@ -0,0 +1,104 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# 로컬 캐시(HTTP 캐시)는 임시 폴더에 만듭니다 (모듈을 불러오기 전에 지정).
+CACHE_DIR = tempfile.mkdtemp(prefix="flint-test-")
+os.environ["FLINT_CACHE_DIR"] = CACHE_DIR
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_cache import HttpCache
+from text_extract import BlockExtractor, CHUNK_SIZE
+
+# =========================================================
+# [테스트] 스트리밍 본문 수집의 조기 종료
+# 가짜 스트리밍 응답이 실제로 내준 바이트 수를 세어, budget을 채우면 나머지 본문을 읽지 않는지 확인합니다.
+# 실행: python -m unittest discover tests
+# =========================================================
+# offercent_sender.extract_text와 같은 설정 (컨테이너 div 포함)
+OFFERCENT_EXTRACT = BlockExtractor(['p', 'h2', 'h3', 'li', 'span', 'div'], min_len=10, budget=3500)
+
+
+class StreamingResponse:
+    """requests 스트리밍 응답 중 fetch_text·from_response가 쓰는 부분만 흉내 내고, 내준 바이트 수를 셉니다."""
+
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+        self.headers = {"Content-Type": "text/html; charset=utf-8"}
+        self.consumed = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            chunk = self.body[start:start + chunk_size]
+            self.consumed += len(chunk)
+            yield chunk
+
+    @property
+    def text(self):
+        self.consumed = len(self.body)
+        return self.body.decode("utf-8")
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class StubSession:
+    def __init__(self, resp):
+        self.resp = resp
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.requests.append({"url": url, "stream": stream})
+        return self.resp
+
+
+def job_page(paragraphs=5000):
+    # 채용 공고 상세처럼 본문 전체를 div가 감싼 큰 페이지 (약 900KB)
+    body = "".join(f"<p>자격 요건 {i}번 항목입니다. 관련 경력과 역량을 설명합니다 {'가나다라' * 10}</p>" for i in range(paragraphs))
+    return f"<html><body><div class='jd'><div class='content'>{body}</div></div></body></html>".encode("utf-8")
+
+
+class StreamingFetchTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = HttpCache(path=os.path.join(CACHE_DIR, f"{self.id()}.sqlite3"))
+
+    def test_from_response_stops_reading_once_budget_is_filled(self):
+        resp = StreamingResponse(job_page())
+        text, html = OFFERCENT_EXTRACT.from_response(resp)
+        self.assertEqual(len(text), 3500)
+        self.assertTrue(resp.closed)
+        self.assertLessEqual(resp.consumed, 2 * CHUNK_SIZE)
+        # 캐시에 남기는 본문은 실제로 읽은 앞부분뿐입니다.
+        self.assertTrue(html.startswith("<html><body><div class='jd'>"))
+        self.assertLess(len(html), len(resp.body) // 10)
+
+    def test_fetch_text_streams_and_caches_only_what_was_read(self):
+        resp = StreamingResponse(job_page())
+        session = StubSession(resp)
+        text = self.cache.fetch_text(session, "https://offercent.co.kr/jd/1", OFFERCENT_EXTRACT,
+                                     text_key="test", stream=True)
+        self.assertTrue(session.requests[0]["stream"])
+        self.assertEqual(len(text), 3500)
+        self.assertLess(resp.consumed, len(resp.body) // 10)
+
+        # 두 번째 호출은 캐시에서 바로 돌려주고 요청하지 않습니다.
+        again = self.cache.fetch_text(session, "https://offercent.co.kr/jd/1", OFFERCENT_EXTRACT,
+                                      text_key="test", stream=True)
+        self.assertEqual(again, text)
+        self.assertEqual(len(session.requests), 1)
+
+
+def tearDownModule():
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
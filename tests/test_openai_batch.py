@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+# 로컬 캐시(LLM 캐시·배치 기록)는 임시 폴더에 만듭니다 (모듈을 불러오기 전에 지정).
+CACHE_DIR = tempfile.mkdtemp(prefix="flint-test-")
+os.environ["FLINT_CACHE_DIR"] = CACHE_DIR
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_utils import LLMCache, llm_call
+from openai_batch import BatchRunner
+
+# =========================================================
+# [테스트] OpenAI Batch 모드 흐름
+# FakeBatchClient로 제출 → 진행 중(다음 실행으로 넘김) → 저장된 batch id로 이어서 확인 → LLM 캐시 반영까지 확인합니다.
+# 실행: python -m unittest discover tests
+# =========================================================
+
+
+class FakeBatchClient:
+    """
+    OpenAI 클라이언트의 files / batches 인터페이스를 흉내 내는 로컬 가짜 Batch 엔드포인트.
+    respond(body)가 돌려준 dict를 응답 content(JSON)로 쓰고, polls_until_done번째 조회에서 완료됩니다.
+    """
+
+    def __init__(self, respond, polls_until_done=1):
+        self._respond = respond
+        self._polls_until_done = polls_until_done
+        self._files = {}
+        self._batches = {}
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _create_file(self, file, purpose):
+        file_id = f"file-{len(self._files) + 1}"
+        self._files[file_id] = file.read().decode("utf-8")
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    def _file_content(self, file_id):
+        return SimpleNamespace(text=self._files[file_id])
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        batch_id = f"batch-{len(self._batches) + 1}"
+        self._batches[batch_id] = {"input": input_file_id, "polls": 0, "output": None}
+        return SimpleNamespace(id=batch_id, status="validating")
+
+    def _retrieve_batch(self, batch_id):
+        batch = self._batches[batch_id]
+        batch["polls"] += 1
+        if batch["polls"] < self._polls_until_done:
+            return SimpleNamespace(id=batch_id, status="in_progress", output_file_id=None, error_file_id=None)
+        if batch["output"] is None:
+            out = []
+            for line in self._files[batch["input"]].splitlines():
+                request = json.loads(line)
+                content = json.dumps(self._respond(request["body"]), ensure_ascii=False)
+                out.append(json.dumps({
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}},
+                    "error": None,
+                }, ensure_ascii=False))
+            batch["output"] = f"file-{len(self._files) + 1}"
+            self._files[batch["output"]] = "\n".join(out)
+        return SimpleNamespace(id=batch_id, status="completed", output_file_id=batch["output"], error_file_id=None)
+
+
+def respond(body):
+    # 본문에 '에디터'가 들어간 글만 적합으로 판단하고, 요약 요청에는 고정된 요약을 돌려줍니다.
+    prompt = body["messages"][1]["content"]
+    if prompt.startswith("판단"):
+        return {"is_appropriate": "에디터" in prompt}
+    return {"summary": prompt[-10:]}
+
+
+def judge_call(text):
+    return llm_call("identity", "v1", "system", f"판단: {text}", text)
+
+
+def summary_call(text):
+    return llm_call("summary", "v1", "system", f"요약: {text}", text)
+
+
+class BatchRunnerTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = LLMCache(path=os.path.join(CACHE_DIR, f"{self.id()}.sqlite3"))
+        self.texts = ["콘텐츠 에디터 모집", "백엔드 개발자 모집", "뉴스레터 에디터 구함"]
+
+    def tearDown(self):
+        shutil.rmtree(os.path.join(CACHE_DIR, "batches"), ignore_errors=True)
+
+    def runner(self, client):
+        # 결과를 기다리지 않도록 대기 시간을 0으로 둡니다 (한 번 확인하고 진행 중이면 다음 실행으로 넘김).
+        return BatchRunner(client, self.cache, "test", poll_interval=0, max_wait=0)
+
+    def test_pending_batch_resumes_from_state_file(self):
+        client = FakeBatchClient(respond, polls_until_done=2)
+        calls = [judge_call(t) for t in self.texts]
+
+        # 1) 첫 실행: 제출 후 아직 진행 중이므로 False, batch id는 상태 파일에 남습니다.
+        first = self.runner(client)
+        self.assertFalse(first.prefill(calls))
+        self.assertTrue(os.path.exists(first.state_path))
+        self.assertIsNone(first.result(calls[0]))
+
+        # 2) 다음 실행(새 BatchRunner): 상태 파일의 batch id로 이어서 확인하고, 다시 제출하지 않습니다.
+        second = self.runner(client)
+        self.assertTrue(second.prefill(calls))
+        self.assertEqual(len(client._batches), 1)
+        self.assertFalse(os.path.exists(second.state_path))
+
+        # 3) 결과는 LLM 캐시에 들어가, 동기 호출(chat_json)과 같은 키로 꺼낼 수 있습니다.
+        self.assertEqual([second.result(c)["is_appropriate"] for c in calls], [True, False, True])
+        self.assertEqual(self.cache.chat_json(None, **calls[0]), {"is_appropriate": True})
+
+        # 4) 모두 캐시된 뒤에는 새 배치를 만들지 않습니다.
+        self.assertTrue(self.runner(client).prefill(calls))
+        self.assertEqual(len(client._batches), 1)
+
+    def test_split_mode_batches_summary_for_appropriate_rows(self):
+        client = FakeBatchClient(respond, polls_until_done=1)
+        pairs = [(judge_call(t), summary_call(t)) for t in self.texts]
+
+        self.assertTrue(self.runner(client).prefill_split(pairs))
+        # 판단 배치 하나, 적합한 두 행의 요약 배치 하나
+        self.assertEqual(len(client._batches), 2)
+        runner = self.runner(client)
+        self.assertIsNotNone(runner.result(pairs[0][1]))
+        self.assertIsNone(runner.result(pairs[1][1]))
+        self.assertIsNotNone(runner.result(pairs[2][1]))
+
+
+def tearDownModule():
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_extract import extract_blocks, _BlockCollector, CHUNK_SIZE
+
+# =========================================================
+# [테스트] 본문 추출 (컨테이너 태그를 대상으로 넣은 offercent 설정)
+# 페이지 전체를 감싼 div가 있어도 문서 순서를 지키고, budget을 채우면 앞부분만 읽고 멈추는지 확인합니다.
+# 실행: python -m unittest discover tests
+# =========================================================
+OFFERCENT_TAGS = ['p', 'h2', 'h3', 'li', 'span', 'div']
+
+
+def wrapped_page(paragraphs):
+    body = "".join(f"<p>문단 번호 {i} 입니다. 채용 공고 본문이 이어집니다 {'가나다라' * 10}</p>" for i in range(paragraphs))
+    return f"<html><body><div class='wrap'><div class='inner'>{body}</div></div></body></html>"
+
+
+class ExtractBlocksTest(unittest.TestCase):
+    def test_container_text_keeps_document_order(self):
+        html = (
+            "<div id='wrap'>머리말 컨테이너 텍스트입니다"
+            "<p>첫 번째 문단 텍스트입니다</p>"
+            " 사이에 있는 느슨한 텍스트 <span>독립된 스팬 텍스트 입니다요</span>"
+            "<ul><li>목록 항목 하나입니다요</li></ul>"
+            "<section>섹션 안의 텍스트입니다요<p>두 번째 문단 텍스트입니다</p>섹션 뒤에 붙은 꼬리 텍스트</section>"
+            "</div>"
+        )
+        self.assertEqual(
+            extract_blocks(html, OFFERCENT_TAGS, min_len=10, budget=3500),
+            "머리말 컨테이너 텍스트입니다 첫 번째 문단 텍스트입니다 사이에 있는 느슨한 텍스트 독립된 스팬 텍스트 입니다요 "
+            "목록 항목 하나입니다요 섹션 안의 텍스트입니다요 두 번째 문단 텍스트입니다 섹션 뒤에 붙은 꼬리 텍스트",
+        )
+
+    def test_wrapped_page_stops_at_budget(self):
+        data = wrapped_page(5000).encode("utf-8")
+        collector = _BlockCollector(OFFERCENT_TAGS, 10, 3500, encoding="utf-8")
+        fed = 0
+        while fed < len(data) and not collector.full:
+            collector.feed(data[fed:fed + CHUNK_SIZE])
+            fed += CHUNK_SIZE
+        # 감싼 div가 끝나기 전(문서 끝)이 아니라 첫 청크 몇 개 안에서 멈춰야 합니다.
+        self.assertTrue(collector.full)
+        self.assertLessEqual(fed, 2 * CHUNK_SIZE)
+        self.assertLess(fed, len(data) // 10)
+        text = collector.text()
+        self.assertEqual(len(text), 3500)
+        self.assertTrue(text.startswith("문단 번호 0 입니다."))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+import re
+from lxml import etree
+
+# =========================================================
+# [공통] 상세 페이지 본문 추출 (lxml, 한 번 순회)
+# 기존 방식(soup.find_all([...]) + 요소마다 get_text)은 div·li처럼 중첩된 태그의
+# 텍스트를 조상마다 다시 이어 붙여, 깊게 중첩된 채용 페이지에서 같은 문장이 여러 번 들어가고
+# 처리 시간도 제곱으로 늘어났습니다.
+# 여기서는 트리를 한 번만 돌면서 각 텍스트 조각을 "가장 가까운 대상 태그" 하나에만 배정하고,
+# 문서 순서대로 budget(글자 수)을 채우면 바로 멈춥니다.
+# div처럼 다른 대상 태그를 감싸는 컨테이너는 안쪽 대상 태그가 시작될 때마다 자기 텍스트를 끊어 확정하므로,
+# 페이지 전체를 감싼 컨테이너가 있어도 앞부분만으로 budget을 채우고 멈출 수 있습니다.
+# 증분 파서(HTMLPullParser)를 쓰므로 응답을 내려받는 도중에도 추출할 수 있어,
+# 스트리밍 모드에서는 budget을 채우거나 MAX_BYTES에 닿으면 나머지 본문은 받지 않습니다.
+# =========================================================
+EXTRACT_VERSION = "blocks-v2"  # 추출 방식이 바뀌면 올려서 HTTP 캐시의 추출 텍스트를 다시 만듭니다.
+SKIP_TAGS = ("script", "style", "noscript", "template")
+# 인라인 태그는 다른 대상 태그 안에 있으면 별도 조각으로 떼지 않고 바깥 문장에 그대로 둡니다.
+INLINE_TAGS = ("span", "a", "strong", "em", "b")
+
+MAX_BYTES = 2 * 1024 * 1024     # 스트리밍 시 압축 해제 후 최대로 읽을 본문 크기
+CHUNK_SIZE = 16 * 1024
+
+
+class _BlockCollector:
+    """HTMLPullParser 이벤트를 받아 대상 태그별 텍스트를 문서 순서대로 모읍니다."""
+
+    def __init__(self, tags, min_len, budget, encoding=None):
+        self.tags = set(tags)
+        self.min_len = min_len
+        self.budget = budget
+        self.parser = etree.HTMLPullParser(events=("start", "end"), encoding=encoding)
+        self.slots = []     # 텍스트 조각마다 문서 순서대로 자리를 잡아 두고, 확정되면 채웁니다.
+        self.stack = []     # 열려 있는 요소마다 [요소, 슬롯 번호, 건너뛸 요소인지, 대상 요소인지]
+        self.open_blocks = 0
+        self.contrib = {}   # 끝난 요소가 부모 문장에 보탤 텍스트 (대상 요소는 따로 저장하므로 "")
+        self.seen = set()
+        self.done = self.size = 0
+        self.full = False
+
+    def feed(self, data):
+        self.parser.feed(data)
+        self._process()
+
+    def close(self):
+        try:
+            self.parser.close()
+        except etree.XMLSyntaxError:
+            return  # 빈 문서
+        self._process()
+
+    def text(self):
+        return " ".join(s for s in self.slots[:self.done] if s)[:self.budget]
+
+    def _fill(self, slot, raw):
+        text = " ".join(raw.split())   # 줄바꿈·연속 공백은 한 칸으로
+        if len(text) > self.min_len and text not in self.seen:
+            self.seen.add(text)
+            self.slots[slot] = text
+        else:
+            self.slots[slot] = ""
+        # 앞에서부터 확정된 조각만 budget 계산에 넣습니다 (문서 순서 유지).
+        while self.done < len(self.slots) and self.slots[self.done] is not None:
+            self.size += len(self.slots[self.done]) + (1 if self.slots[self.done] else 0)
+            self.done += 1
+        if self.size > self.budget:
+            self.full = True
+
+    def _split_ancestors(self, ended):
+        """
+        대상 요소 하나가 끝날 때 호출합니다. 이 요소를 감싼 바깥 대상 요소(div 같은 컨테이너)마다
+        이 요소 앞쪽 텍스트는 모두 확정됐으므로 그 자리에서 채우고, 이후 텍스트는
+        지금 열려 있는 자식이 끝난 뒤 새 자리에 모읍니다.
+        이렇게 해야 문서 전체를 감싼 컨테이너가 끝날 때까지 앞쪽 조각이 막히지 않습니다.
+        """
+        blocks = [i for i, entry in enumerate(self.stack) if entry[3]]
+        for n, i in enumerate(blocks):
+            block = self.stack[i]
+            if block[4] is not None:
+                continue    # 이미 나뉘어 열린 자식이 끝나기를 기다리는 중
+            end = blocks[n + 1] if n + 1 < len(blocks) else len(self.stack)
+            pieces = []
+            # 컨테이너부터 다음 대상 요소 직전까지: 각자의 text와 열린 자식 앞의 끝난 자식들을 소비합니다.
+            for depth in range(i, end):
+                el = self.stack[depth][0]
+                open_child = self.stack[depth + 1][0] if depth + 1 < len(self.stack) else ended
+                pieces.append(el.text or "")
+                el.text = None
+                consumed = 0
+                for child in el:
+                    if child is open_child:
+                        break
+                    pieces.append(self.contrib.pop(child, ""))
+                    pieces.append(child.tail or "")
+                    consumed += 1
+                del el[:consumed]
+            self._fill(block[1], "".join(pieces))
+            if i + 1 < len(self.stack):
+                block[1], block[4] = None, self.stack[i + 1][0]
+            else:
+                # 끝난 요소가 바로 자식이면 뒤따르는 텍스트의 자리를 바로 잡습니다.
+                block[1] = len(self.slots)
+                self.slots.append(None)
+
+    def _process(self):
+        for event, el in self.parser.read_events():
+            tag = el.tag if isinstance(el.tag, str) else None
+            if event == "start":
+                skip = tag in SKIP_TAGS or bool(self.stack and self.stack[-1][2])
+                is_block = not skip and tag in self.tags and not (self.open_blocks and tag in INLINE_TAGS)
+                slot = None
+                if is_block:
+                    slot = len(self.slots)
+                    self.slots.append(None)
+                    self.open_blocks += 1
+                # [요소, 슬롯 번호, 건너뛸 요소인지, 대상 요소인지, 나뉜 지점(열려 있던 자식)]
+                self.stack.append([el, slot, skip, is_block, None])
+                continue
+
+            # event == "end": 요소의 text와 자식들의 tail이 모두 확정된 시점
+            _, slot, skip, is_block, _ = self.stack.pop()
+            if skip:
+                own = ""
+            else:
+                pieces = [el.text or ""]
+                for child in el:    # 주석은 이벤트가 없으므로 tail만 반영됩니다.
+                    pieces.append(self.contrib.pop(child, ""))
+                    pieces.append(child.tail or "")
+                own = "".join(pieces)
+            del el[:]   # 자식은 더 이상 필요 없으므로 메모리에서 해제
+
+            # 부모 컨테이너가 이 요소 앞에서 나뉘었다면, 뒤따르는 텍스트를 모을 자리를 새로 잡습니다.
+            parent = self.stack[-1] if self.stack else None
+            if parent is not None and parent[4] is el:
+                parent[1] = len(self.slots)
+                self.slots.append(None)
+                parent[4] = None
+
+            if not is_block:
+                self.contrib[el] = own
+                continue
+            self.open_blocks -= 1
+            self.contrib[el] = ""
+            self._fill(slot, own)
+            self._split_ancestors(el)
+            if self.full:
+                return
+
+
+def extract_blocks(html, tags, min_len=10, budget=3500):
+    """
+    tags에 해당하는 요소의 텍스트를 문서 순서대로 모아 공백으로 이어 붙입니다.
+    - 중첩된 대상 태그의 텍스트는 안쪽 요소에만 들어가므로 중복되지 않습니다.
+      (단, 문단 안의 span 같은 인라인 태그는 바깥 문단의 일부로 남깁니다.)
+    - 길이가 min_len 이하인 조각과 이미 나온 조각은 버립니다.
+    - 앞에서부터 확정된 조각이 budget 글자를 넘으면 나머지 문서는 보지 않습니다.
+    """
+    if not html or not html.strip():
+        return ""
+    # 인코딩 선언이 있는 문서도 같은 방식으로 읽도록 bytes로 넣습니다.
+    collector = _BlockCollector(tags, min_len, budget, encoding="utf-8")
+    data = html.encode("utf-8")
+    for start in range(0, len(data), CHUNK_SIZE * 4):
+        collector.feed(data[start:start + CHUNK_SIZE * 4])
+        if collector.full:
+            return collector.text()
+    collector.close()
+    return collector.text()
+
+
+def _response_encoding(resp):
+    match = re.search(r"charset=([\w-]+)", resp.headers.get("Content-Type", ""), re.I)
+    return match.group(1) if match else "utf-8"
+
+
+class BlockExtractor:
+    """
+    sender별 추출 설정 묶음.
+    - extractor(html): 이미 받은 본문에서 추출
+    - extractor.from_response(resp): stream=True 응답을 읽으면서 추출하고, 충분하면 연결을 끊습니다.
+      반환값은 (텍스트, 실제로 읽은 본문) 입니다.
+    """
+
+    def __init__(self, tags, min_len=10, budget=3500, max_bytes=MAX_BYTES):
+        self.tags = tags
+        self.min_len = min_len
+        self.budget = budget
+        self.max_bytes = max_bytes
+
+    def __call__(self, html):
+        return extract_blocks(html, self.tags, self.min_len, self.budget)
+
+    def from_response(self, resp):
+        encoding = _response_encoding(resp)
+        collector = _BlockCollector(self.tags, self.min_len, self.budget, encoding=encoding)
+        received, chunks = 0, []
+        try:
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                received += len(chunk)
+                chunks.append(chunk)
+                collector.feed(chunk)
+                if collector.full or received >= self.max_bytes:
+                    break
+        finally:
+            resp.close()
+        if not collector.full:
+            collector.close()
+        return collector.text(), b"".join(chunks).decode(encoding, errors="replace")